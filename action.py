@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Optional, Tuple, TypeAlias, Dict, List, ClassVar, Any
+from operator import attrgetter
+from typing import Optional, Tuple, TypeAlias, Dict, List, ClassVar, Any, Callable
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,13 +9,73 @@ logger = logging.getLogger(__name__)
 Coordinate: TypeAlias = Tuple[float, float, float, float]
 Point: TypeAlias = Tuple[float, float]
 
-# 支持的操作类型
-ACTION_TYPE = [
+# 支持的操作类型（frozenset 便于 O(1) 判断）
+ACTION_TYPE = frozenset([
     'start', 'click', 'left_double', 'right_single', 'drag', 'hotkey', 'type', 'scroll', 'wait', 'finished', 'call_user', 'switch_tab'
-]
-
-
-@dataclass
+])
+
+
+def _no_required_fields(action):
+    """没有必需字段的操作类型无需校验"""
+
+
+def _make_validator(action_type, fields):
+    """为一种操作类型构造校验函数：一次取出全部必需字段，缺失时抛出 ValueError"""
+    if not fields:
+        return _no_required_fields
+    getter = attrgetter(*fields)
+    single = len(fields) == 1  # 只有一个字段时 attrgetter 返回值本身而非元组
+
+    def validator(action):
+        values = (getter(action),) if single else getter(action)
+        if None in values:
+            missing = fields[values.index(None)]
+            raise ValueError(f"Action type '{action_type}' requires field '{missing}' which is not provided.")
+
+    return validator
+
+
+def _make_repr(action_type, fields):
+    """为一种操作类型构造 __repr__ 函数：字段列表已知，预先生成格式模板，调用时只需一次 format"""
+    template = f"Action(action_type='{action_type}', " + ', '.join(f"{name}={{}}" for name in fields) + ")"
+    if not fields:
+        return lambda action: template
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        return lambda action: template.format(getter(action))
+    return lambda action: template.format(*getter(action))
+
+
+# 定义各操作类型必需的字段
+REQUIRED_FIELDS: Dict[str, List[str]] = {
+    'click': ['start_box'],
+    'left_double': ['start_box'],
+    'right_single': ['start_box'],
+    'drag': ['start_box', 'end_box'],
+    'scroll': ['start_box', 'deltas'],
+    'type': ['content'],
+    'hotkey': ['key'],
+    'wait': [],  # wait 操作不需要额外字段
+    'finished': [],  # finished 操作不需要额外字段
+    'call_user': ['question'],
+    'switch_tab': ['tab_index']
+}
+
+# 预先为每种操作类型（包括未列出必需字段的类型）构造校验函数，校验时只需一次函数调用
+_VALIDATORS: Dict[str, Callable[[Any], None]] = {
+    action_type: _make_validator(action_type, tuple(REQUIRED_FIELDS.get(action_type, ())))
+    for action_type in ACTION_TYPE
+}
+
+# 同样为每种操作类型预先构造 __repr__ 函数
+_REPRS: Dict[str, Callable[[Any], str]] = {
+    action_type: _make_repr(action_type, tuple(REQUIRED_FIELDS.get(action_type, ())))
+    for action_type in ACTION_TYPE
+}
+
+
+# 使用 __slots__ 存储字段，省去每个实例的 __dict__，属性访问更快、内存更省
+@dataclass(slots=True)
 class Action:
     action_type: str
     content: Optional[str] = None
@@ -25,21 +86,10 @@ class Action:
     question: Optional[str] = None
     answer: Optional[str] = None
     tab_index: Optional[int] = None
+    message: Optional[str] = None
 
-    # 定义各操作类型必需的字段
-    REQUIRED_FIELDS: ClassVar[Dict[str, List[str]]] = {
-        'click': ['start_box'],
-        'left_double': ['start_box'],
-        'right_single': ['start_box'],
-        'drag': ['start_box', 'end_box'],
-        'scroll': ['start_box', 'deltas'],
-        'type': ['content'],
-        'hotkey': ['key'],
-        'wait': [],  # wait 操作不需要额外字段
-        'finished': [],  # finished 操作不需要额外字段
-        'call_user': ['question'],
-        'switch_tab': ['tab_index']
-    }
+    # 保留类属性形式的访问方式，实际定义见模块级常量
+    REQUIRED_FIELDS: ClassVar[Dict[str, List[str]]] = REQUIRED_FIELDS
 
     def __init__(self, action_type, params=None):
         """根据传入的字典初始化 Action 对象"""
@@ -57,18 +107,17 @@ class Action:
         self.tab_index = params.get('tab_index', None)
         self.message = None
 
-        # 验证字段
+        # 验证字段：校验函数表覆盖全部操作类型，一次查表即可同时判断类型是否支持
         if not self.action_type:
             raise ValueError("action_type is required")
-        assert self.action_type in ACTION_TYPE, f"不支持的操作类型: {self.action_type}"
-        self.validate()
+        validator = _VALIDATORS.get(self.action_type)
+        if validator is None:
+            raise AssertionError(f"不支持的操作类型: {self.action_type}")
+        validator(self)
 
     def validate(self) -> bool:
         """检查当前 Action 对象是否符合其 type 所要求的字段"""
-        required_fields = self.REQUIRED_FIELDS.get(self.action_type, [])
-        for field in required_fields:
-            if getattr(self, field) is None:
-                raise ValueError(f"Action type '{self.action_type}' requires field '{field}' which is not provided.")
+        _VALIDATORS[self.action_type](self)
         return True
 
     def parse_content(self) -> Tuple[str, bool]:
@@ -87,11 +136,19 @@ class Action:
     def calculate_center(box: Coordinate) -> Point:
         return (box[0] + box[2]) // 2, (box[1] + box[3]) // 2
 
+    @property
+    def center(self) -> Point:
+        """start_box 的中心点，每次按当前的 start_box 计算，修改坐标后保持最新"""
+        return self.calculate_center(self.start_box)
+
+    @property
+    def end_center(self) -> Point:
+        """end_box 的中心点，每次按当前的 end_box 计算"""
+        return self.calculate_center(self.end_box)
+
     def __repr__(self):
-        fields = []
-        for field_name in self.REQUIRED_FIELDS.get(self.action_type, []):
-            fields.append(f"{field_name}={getattr(self, field_name)}")
-        return f"Action(action_type='{self.action_type}', {', '.join(fields)})"
+        # 只缓存按类型预先生成的模板，字段值每次读取，修改字段后 repr 仍保持最新
+        return _REPRS[self.action_type](self)
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -121,17 +178,17 @@ class Action:
         动作的字符串表示
         """
         if self.action_type == 'click':
-            center = self.calculate_center(self.start_box)
+            center = self.center
             return f"单击 {center}"
         elif self.action_type == 'left_double':
-            center = self.calculate_center(self.start_box)
+            center = self.center
             return f"双击 {center}"
         elif self.action_type == 'right_single':
-            center = self.calculate_center(self.start_box)
+            center = self.center
             return f"右键单击 {center}"
         elif self.action_type == 'drag':
-            start = self.calculate_center(self.start_box)
-            end = self.calculate_center(self.end_box)
+            start = self.center
+            end = self.end_center
             return f"拖拽 从 {start} 到 {end}"
         elif self.action_type == 'hotkey':
             return f"按快捷键 {self.key}"
@@ -142,7 +199,7 @@ class Action:
             else:
                 return f"输入 '{content}'"
         elif self.action_type == 'scroll':
-            center = self.calculate_center(self.start_box)
+            center = self.center
             return f"在 {center} 处滚动 {self.deltas}"
         elif self.action_type == 'call_user':
             if self.answer:
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import pathlib
 from datetime import datetime
 
 from browser_controller import BrowserController  # 假设 browser_controller.py 文件已存在
@@ -33,16 +34,18 @@ logging.basicConfig(
 
 
 class Agent:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, session_mode=False):
         """
         初始化 Agent 实例。
 
         Args:
             api_key (str): 用于 VisionLLM 的 API Key。
+            session_mode (bool): 为 True 时任务结束不关闭浏览器，下次任务复用同一会话。
         """
         self.brain = VisionLLM(api_key=api_key)  # 传递API Key到VisionLLM
-        self.hands = BrowserController()  # BrowserController 实例
-        self.screenshot_cache = []  # 初始化截图缓存列表
+        self.hands = BrowserController(session_mode=session_mode)  # BrowserController 实例
+        self.SCREENSHOT_QUEUE_SIZE = 2  # 待写盘截图的队列上限
+        self.SCREENSHOT_FORMAT = "jpeg"  # 截图格式，jpeg 比 png 小数倍，减少每步上传给大模型的数据量
         self.logger = logging.getLogger(f'Agent')  # 使用更具描述性的 logger 名称
         self._is_stop_work = False
 
@@ -72,6 +75,9 @@ class Agent:
         self.logger.info(f"任务开始：'{user_instruction}'，目标网站：'{self.hands.website_url}'")
 
         await self.hands.initialize()
+        # 截图写盘队列：后台任务在大模型思考期间把截图落盘，队列有界以形成背压
+        screenshot_queue = asyncio.Queue(maxsize=self.SCREENSHOT_QUEUE_SIZE)
+        writer = asyncio.create_task(self._screenshot_writer(screenshot_queue))
         try:  # 使用 try...finally 确保即使发生异常也关闭浏览器
             while action.action_type not in ['finished', 'call_user'] and not self._is_stop_work:
                 step += 1
@@ -79,10 +85,10 @@ class Agent:
                 
                 # 捕获当前页面信息
                 try:
-                    info = await self.hands.save_page_info()
+                    info = await self.hands.save_page_info(screenshot_format=self.SCREENSHOT_FORMAT)
                     screenshot = info.get('screenshot', None)
                     if screenshot:
-                        self.screenshot_cache.append(screenshot)  # 缓存截图
+                        await screenshot_queue.put((step, screenshot))  # 交给后台任务写盘
                 except Exception as e:
                     self.logger.error(f"捕获页面信息失败: {e}")
                     if step > 1:  # 如果不是第一步，尝试继续
@@ -93,9 +99,9 @@ class Agent:
                 self.logger.info(f"历史动作：{history}")
                 self.logger.info(f"VisionLLM 思考中......")
                 
-                # AI思考并决定动作
-                thought, action = self.brain.think(page_info=info,
-                                                   user_instruction=user_instruction, history=history)
+                # AI思考并决定动作（在线程中请求大模型，期间事件循环继续写盘截图）
+                thought, action = await asyncio.to_thread(self.brain.think, page_info=info,
+                                                          user_instruction=user_instruction, history=history)
                 self.logger.info(f"VisionLLM 思考结果 - Thought: '{thought}', Action: '{action}'")
                 history.append(f'thought:{thought},action:{action}')
                 
@@ -128,33 +134,37 @@ class Agent:
             # 清理资源
             await self.hands.shutdown()
             self.logger.info(f"浏览器已关闭。")
-            self._save_cached_screenshots()  # 任务结束后保存所有缓存的截图
+            # 等待剩余截图写盘完成
+            await screenshot_queue.put(None)
+            await writer
             self.logger.info(f"截图已保存，任务结束。")
             
             # 移除文件处理器以避免资源泄漏
             self.logger.removeHandler(file_handler)
             file_handler.close()
 
-    def _save_cached_screenshots(self):
+    async def _screenshot_writer(self, queue):
         """
-        保存缓存的截图到任务专属日志文件夹。
+        从队列中取出截图并保存到任务专属日志文件夹，收到 None 时结束。
         """
-        if not self.screenshot_cache:
-            self.logger.info("截图缓存为空，无需保存。")
-            return
-
-        self.logger.info(f"开始保存缓存的 {len(self.screenshot_cache)} 张截图...")
-        for i, screenshot in enumerate(self.screenshot_cache):
+        extension = 'jpg' if self.SCREENSHOT_FORMAT == 'jpeg' else self.SCREENSHOT_FORMAT
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            step, screenshot = item
             screenshot_filename = os.path.join(self.task_log_dir,
-                                               f'screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S_%f")}_{i + 1}.png')
+                                               f'screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S_%f")}_{step}.{extension}')
             try:
-                with open(screenshot_filename, 'wb') as f:
-                    f.write(screenshot)
-                self.logger.info(f"截图 {i + 1} 已保存: {screenshot_filename}")
+                # 在线程中写盘，不阻塞事件循环
+                await asyncio.to_thread(pathlib.Path(screenshot_filename).write_bytes, screenshot)
+                self.logger.info(f"截图 {step} 已保存: {screenshot_filename}")
             except Exception as e:
-                self.logger.error(f"保存截图 {i + 1} 失败: {e}")
-        self.screenshot_cache = []  # 清空缓存列表
-        self.logger.info("所有缓存截图保存完毕，缓存已清空。")
+                self.logger.error(f"保存截图 {step} 失败: {e}")
+
+    def update_api_key(self, api_key):
+        """更新大模型的 API Key，保留已有的浏览器会话"""
+        self.brain.set_api_key(api_key)
 
     def set_website(self, website_url):
         self.hands.set_website_url(website_url)
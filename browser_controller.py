@@ -1,11 +1,15 @@
+import atexit
 import base64
+import json
 import time
 import logging
-import subprocess
 import platform
 import os
+import pathlib
+import tempfile
 from pyexpat.errors import messages
 from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse
 
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page, TimeoutError
 import asyncio
@@ -13,10 +17,126 @@ from action import Action, Coordinate
 from utils.error import BrowserOperationError
 from utils.get_absolute_path import get_absolute_path
 
+# 截图的 base64 编码优先使用 SIMD 加速的 pybase64，未安装时回退到标准库
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
+
+# 多个 BrowserController 共享的 Playwright / Browser 实例（share_browser=True 时使用）
+_shared_playwright = None
+_shared_browser: Optional[Browser] = None
+_shared_lock: Optional[asyncio.Lock] = None
+_shared_chrome_process = None
+
 
 class BrowserController:
-    def __init__(self, website_url: str = None, use_local_chrome: bool = True):
+    # 鼠标移动动画脚本，所有可变部分通过参数传入，脚本文本保持不变以便浏览器复用编译结果
+    # 移动方向由脚本根据视口尺寸自行计算
+    _MOUSE_MOVE_JS = """
+        ({ x, y, svgUrl }) => {
+            // 计算初始移动方向（基于目标点与视口中心的相对位置）
+            const dx = x < window.innerWidth / 2 ? -200 : 200;  // 横向偏移量
+            const dy = y < window.innerHeight / 2 ? -200 : 200;  // 纵向偏移量
+            const rotate = dx > 0 ? 30 : -30;  // 根据方向设置旋转角度
+
+            // 移除任何已存在的鼠标动画元素
+            const existingMouse = document.getElementById('animated-mouse');
+            if (existingMouse) existingMouse.remove();
+
+            // 创建新的鼠标元素
+            const moveImg = document.createElement('img');
+            moveImg.id = 'animated-mouse';
+            moveImg.src = svgUrl;
+
+            // 设置元素基础样式
+            moveImg.style.position = 'fixed'; // 使用fixed而不是absolute，以避免滚动问题
+            moveImg.style.width = '30px';
+            moveImg.style.height = '30px';
+            moveImg.style.zIndex = '9999';
+            moveImg.style.pointerEvents = 'none';
+
+            // 设置初始位置（基于目标位置和偏移量计算）
+            const startX = x + dx;
+            const startY = y + dy;
+            moveImg.style.left = startX - 15 + 'px';
+            moveImg.style.top = startY - 15 + 'px';
+            moveImg.style.transform = `rotate(${rotate}deg) scale(0.3)`;
+
+            document.body.appendChild(moveImg);
+
+            // 确保DOM更新后再开始动画
+            setTimeout(() => {
+                moveImg.style.transition = 'all 0.6s cubic-bezier(0.34, 1.56, 0.64, 1)';
+                moveImg.style.left = (x - 15) + 'px';
+                moveImg.style.top = (y - 15) + 'px';
+                moveImg.style.transform = 'rotate(0deg) scale(1)';
+            }, 10);
+
+            // 动画结束后移除元素
+            setTimeout(() => {
+                moveImg.remove();
+            }, 1200);
+        }
+    """
+
+    # 调用页面中已安装的动画函数，只传坐标；返回 False 表示该页面尚未安装
+    _MOUSE_MOVE_CALL_JS = """
+        ([x, y]) => {
+            const move = window.__browseticMouseMove;
+            if (!move) return false;
+            move({ x, y, svgUrl: window.__browseticMouseSvg });
+            return true;
+        }
+    """
+
+    # 可见文本提取脚本：遍历 DOM，跳过不可见、aria-hidden 以及脚本/样式等子树，达到长度上限后停止
+    _VISIBLE_TEXT_JS = """
+        (limit) => {
+            const root = document.body;
+            if (!root) return '';
+            const SKIP_TAGS = new Set(['script', 'style', 'noscript', 'template', 'svg', 'iframe']);
+            const walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+                acceptNode(node) {
+                    if (node.nodeType === Node.TEXT_NODE) {
+                        return node.nodeValue.trim() ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_REJECT;
+                    }
+                    // 拒绝元素会跳过整棵子树
+                    if (SKIP_TAGS.has(node.localName) || node.getAttribute('aria-hidden') === 'true'
+                        || node.getClientRects().length === 0) {
+                        return NodeFilter.FILTER_REJECT;
+                    }
+                    return NodeFilter.FILTER_SKIP;
+                }
+            });
+            const parts = [];
+            let length = 0;
+            let node;
+            while (length < limit && (node = walker.nextNode())) {
+                const text = node.nodeValue.trim();
+                parts.push(text);
+                length += text.length + 1;
+            }
+            return parts.join(' ').slice(0, limit);
+        }
+    """
+
+    # 鼠标图标的 data URL 缓存（类级别，首次使用时加载）
+    _mouse_svg_url: Optional[str] = None
+
+    def __init__(self, website_url: str = None, use_local_chrome: bool = True, session_mode: bool = False,
+                 wait_time: float = 0.05, share_browser: bool = False, headless: bool = False,
+                 show_cursor_animation: Optional[bool] = None):
         self.use_local_chrome = use_local_chrome
+        self.headless = headless  # 仅对 Playwright 自带的浏览器生效
+        # 鼠标移动动画仅在有人观看时有意义，默认在无头模式下关闭
+        self._show_cursor_animation = not headless if show_cursor_animation is None else show_cursor_animation
+        # 共享模式：进程内所有实例共用一个 Playwright 和 Browser，各自使用独立的 context
+        self._share_browser = share_browser
+        self._browser_over_cdp = False  # 浏览器是否通过 CDP 连接到本地 Chrome
+        # 会话模式：cleanup() 只重置页面，浏览器保持常驻，供后续任务复用
+        self._session_mode = session_mode
         # Set Chrome path based on operating system
         if platform.system() == "Darwin":  # macOS
             self.chrome_path = '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'
@@ -24,19 +144,48 @@ class BrowserController:
         else:
             self.chrome_path = None  # Will use Playwright's bundled browser
 
-        self.WAIT_TIME = 2  # 统一管理超时常量
+        self.WAIT_TIME = wait_time  # 鼠标动画启动后、执行鼠标操作前的等待时长
+        self.NAVIGATION_SETTLE_TIME = 0.5  # 输入操作后观察是否发起导航的时长（秒）
+        self.NAVIGATION_TIMEOUT = 10  # 已发起的导航等待新文档提交的最长时间（秒）
+        self.VIEWPORT = {"width": 1280, "height": 720}  # 页面视口尺寸
+        self.MAX_TEXT_CHARS = 200000  # 页面文本捕获的最大字符数，在浏览器端截断
+        self.MAX_JS_CHARS = 500000  # 单段页面脚本捕获的最大字符数，在浏览器端截断
         self.is_online = True
         self._state = {'finished': False, 'user_requested': False}
         self._browser = None
         self._page = None
         self._context = None
+        self._context_has_viewport = False  # context 是否在创建时已指定视口（否则需逐页设置）
         self._playwright = None
+        self._cdp = None  # 当前页面的 CDP 会话
+        self._cdp_page = None  # CDP 会话所绑定的页面
+        self._mouse_init_context = None  # 已注册鼠标动画初始化脚本的 context
+        self._last_screenshot = None  # 上一张截图及其 base64 编码，页面未变化时复用编码结果
+        self._last_img_base64 = None
         self.debug_port = 9222
         self.chrome_process = None
         self.logger = logging.getLogger(self.__class__.__name__)
         self.website_url = website_url
-        self._pages = []  # 存储所有打开的页面
+        self._pages: Dict[int, Page] = {}  # 存储所有打开的页面，以 id(page) 为键，O(1) 判断是否已记录
         self._page_listeners = []  # 存储页面事件监听器
+        self._never_idle_hosts = set()  # 等待 networkidle 超时过的站点，之后不再等待
+        # 操作指令路由表，只在初始化时构建一次
+        self._handlers = {
+            'click': self._handle_click,
+            'left_double': self._handle_double_click,
+            'right_single': self._handle_right_click,
+            'drag': self._handle_drag,
+            'hotkey': self._handle_hotkey,
+            'type': self._handle_type,
+            'scroll': self._handle_scroll,
+            'switch_tab': self._handle_switch_tab,
+        }
+        self.PAGE_POOL_SIZE = 2  # 预热的空白页面数量
+        self._page_pool: List[Page] = []  # 预热/回收的空白页面，供新标签页复用
+        self._listened_pages = set()  # 已注册事件监听器的页面
+        if self._session_mode:
+            # 会话模式下浏览器在任务之间常驻，进程退出时确保终止自己启动的 Chrome
+            atexit.register(self._terminate_chrome_process)
 
     def set_website_url(self, website_url: str):
         if website_url and 'http' not in website_url:
@@ -44,72 +193,212 @@ class BrowserController:
         self.website_url = website_url
         assert self.website_url, "News website cannot be None!"
 
+    def _chrome_pid_file(self) -> str:
+        """记录由本程序启动的 Chrome 进程 PID 的文件路径"""
+        return os.path.join(tempfile.gettempdir(), f'browsetic_chrome_{self.debug_port}.pid')
+
+    def _write_chrome_pid_file(self, pid: int) -> None:
+        try:
+            with open(self._chrome_pid_file(), 'w') as f:
+                f.write(str(pid))
+        except OSError as e:
+            self.logger.warning(f"Failed to write Chrome pid file: {e}")
+
+    def _remove_chrome_pid_file(self) -> None:
+        try:
+            os.remove(self._chrome_pid_file())
+        except OSError:
+            pass
+
+    def _is_chrome_pid_alive(self) -> bool:
+        """根据 PID 文件判断之前启动的 Chrome 是否仍在运行"""
+        try:
+            with open(self._chrome_pid_file()) as f:
+                pid = int(f.read().strip())
+            os.kill(pid, 0)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    async def _is_cdp_endpoint_ready(self) -> bool:
+        """请求 CDP 的 /json/version 接口，返回 200 说明 Chrome 已可接受连接"""
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection('localhost', self.debug_port), timeout=0.2)
+            writer.write(b"GET /json/version HTTP/1.0\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout=0.2)
+            return b" 200 " in status_line
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def _wait_for_debug_port(self, attempts: int = 30) -> bool:
+        """轮询 CDP 就绪接口，直到 Chrome 可接受连接（默认最多约 3 秒），返回是否就绪"""
+        for _ in range(attempts):
+            if await self._is_cdp_endpoint_ready():
+                return True
+            await asyncio.sleep(0.1)
+        self.logger.warning("Chrome debug port not ready")
+        return False
+
+    async def _launch_browser(self, playwright) -> Browser:
+        """连接本地 Chrome（必要时先启动）或启动 Playwright 自带的浏览器"""
+        if self.use_local_chrome and self.chrome_path and os.path.exists(self.chrome_path):
+            self.logger.info("Using local Chrome browser")
+            self._browser_over_cdp = True
+
+            # Check if Chrome is already running with remote debugging
+            # 以调试端口是否可用为准；PID 文件只作提示：进程仍存活时可能是刚启动、端口尚未就绪的 Chrome，稍等片刻
+            chrome_running = await self._is_cdp_endpoint_ready()
+            if not chrome_running and self._is_chrome_pid_alive():
+                chrome_running = await self._wait_for_debug_port(attempts=10)
+
+            if not chrome_running:
+                # 端口不可用，PID 文件已失效（进程已退出，或 PID 被其他进程复用）
+                self._remove_chrome_pid_file()
+                # Launch Chrome with remote debugging enabled
+                user_data_dir = os.path.expanduser("~/Library/Application Support/Google/Chrome")
+                self.chrome_process = await asyncio.create_subprocess_exec(
+                    self.chrome_path,
+                    f'--remote-debugging-port={self.debug_port}',
+                    '--no-first-run',
+                    '--no-default-browser-check',
+                    f'--user-data-dir={user_data_dir}',
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                self._write_chrome_pid_file(self.chrome_process.pid)
+                # Wait for Chrome to start
+                await self._wait_for_debug_port()
+
+            # Connect to the running Chrome instance
+            return await playwright.chromium.connect_over_cdp(f'http://localhost:{self.debug_port}')
+
+        # Use Playwright's bundled browser
+        self._browser_over_cdp = False
+        return await playwright.chromium.launch(
+            headless=self.headless,
+            args=[
+                "--disable-blink-features=AutomationControlled",
+            ]
+        )
+
+    async def _acquire_shared_browser(self):
+        """获取进程内共享的 Playwright 与 Browser 实例，不存在或已断开时创建"""
+        global _shared_playwright, _shared_browser, _shared_lock, _shared_chrome_process
+        if _shared_lock is None:
+            _shared_lock = asyncio.Lock()
+        async with _shared_lock:
+            if _shared_browser is None or not _shared_browser.is_connected():
+                if _shared_playwright is None:
+                    _shared_playwright = await async_playwright().start()
+                _shared_browser = await self._launch_browser(_shared_playwright)
+                # 共享浏览器的进程由 shutdown_shared() 统一终止
+                if self.chrome_process is not None:
+                    _shared_chrome_process, self.chrome_process = self.chrome_process, None
+            return _shared_playwright, _shared_browser
+
+    @classmethod
+    async def shutdown_shared(cls) -> None:
+        """关闭所有实例共享的 Browser 与 Playwright（进程退出前调用）"""
+        global _shared_playwright, _shared_browser, _shared_chrome_process
+        if _shared_browser is not None:
+            try:
+                await _shared_browser.close()
+            except Exception:
+                pass
+            _shared_browser = None
+        if _shared_playwright is not None:
+            try:
+                await _shared_playwright.stop()
+            except Exception:
+                pass
+            _shared_playwright = None
+        if _shared_chrome_process is not None:
+            try:
+                _shared_chrome_process.terminate()
+            except Exception as e:
+                logging.getLogger(cls.__name__).warning(f"Failed to terminate Chrome process: {e}")
+            _shared_chrome_process = None
+
+    def _is_session_alive(self) -> bool:
+        """判断是否存在可复用的浏览器会话"""
+        return bool(self._browser and self._browser.is_connected() and self._context)
+
+    async def _resume_session(self) -> None:
+        """复用常驻的浏览器会话，只确保存在可用页面并导航到目标网站"""
+        pages = await self.get_all_pages()
+        if pages:
+            self._page = pages[0]
+        else:
+            self._page = await self._context.new_page()
+            self._pages = {id(self._page): self._page}
+        self.logger.info("Reusing existing browser session")
+
+        if self.website_url:
+            await self.navigate(self.website_url)
+            self.logger.info(f"Navigated to {self.website_url}")
+
     async def initialize(self) -> None:
         """初始化浏览器环境"""
+        if self._session_mode and self._is_session_alive():
+            try:
+                await self._resume_session()
+                return
+            except Exception as e:
+                self.logger.warning(f"Failed to reuse browser session, reinitializing: {e}")
+                await self.hard_cleanup()
+
         try:
-            self._playwright = await async_playwright().start()
-
-            if self.use_local_chrome and self.chrome_path and os.path.exists(self.chrome_path):
-                self.logger.info("Using local Chrome browser")
-
-                # Check if Chrome is already running with remote debugging
-                import socket
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                chrome_running = s.connect_ex(('localhost', self.debug_port)) == 0
-                s.close()
-
-                if not chrome_running:
-                    # Launch Chrome with remote debugging enabled
-                    user_data_dir = os.path.expanduser("~/Library/Application Support/Google/Chrome")
-                    self.chrome_process = subprocess.Popen([
-                        self.chrome_path,
-                        f'--remote-debugging-port={self.debug_port}',
-                        '--no-first-run',
-                        '--no-default-browser-check',
-                        f'--user-data-dir={user_data_dir}'
-                    ])
-                    # Wait for Chrome to start
-                    await asyncio.sleep(1.5)
-
-                # Connect to the running Chrome instance
-                self._browser = await self._playwright.chromium.connect_over_cdp(f'http://localhost:{self.debug_port}')
+            if self._share_browser:
+                self._playwright, self._browser = await self._acquire_shared_browser()
+                # 共享浏览器时每个实例使用独立的 context，互不干扰
+                self._context = await self._browser.new_context(viewport=self.VIEWPORT)
+                self._context_has_viewport = True
+                self._page = await self._context.new_page()
+                self._pages = {id(self._page): self._page}
+            else:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._launch_browser(self._playwright)
 
                 # Get existing context or create a new one
-                if len(self._browser.contexts) > 0:
+                if self._browser_over_cdp and len(self._browser.contexts) > 0:
                     self._context = self._browser.contexts[0]
                     # 获取所有已存在的页面
-                    self._pages = self._context.pages
-                    if len(self._pages) > 0:
-                        self._page = self._pages[0]  # 使用第一个页面作为当前页面
+                    existing_pages = self._context.pages
+                    self._pages = {id(page): page for page in existing_pages}
+                    if len(existing_pages) > 0:
+                        self._page = existing_pages[0]  # 使用第一个页面作为当前页面
                     else:
                         self._page = await self._context.new_page()
-                        self._pages.append(self._page)
+                        self._pages[id(self._page)] = self._page
                 else:
-                    self._context = await self._browser.new_context()
+                    self._context = await self._browser.new_context(viewport=self.VIEWPORT)
+                    self._context_has_viewport = True
                     self._page = await self._context.new_page()
-                    self._pages = [self._page]
-
-            else:
-                # Use Playwright's bundled browser
-                self._browser = await self._playwright.chromium.launch(
-                    headless=False,
-                    args=[
-                        "--disable-blink-features=AutomationControlled",
-                    ]
-                )
-                self._context = await self._browser.new_context()
-                self._page = await self._context.new_page()
-                self._pages = [self._page]
+                    self._pages = {id(self._page): self._page}
 
             # Common setup
-            await self._page.set_viewport_size({"width": 1280, "height": 720})
+            # 复用的已有 context 无法在创建时指定视口，只能为当前页面单独设置
+            if not self._context_has_viewport:
+                await self._page.set_viewport_size(self.VIEWPORT)
 
             # Set default navigation timeout to avoid getting stuck
             self._page.set_default_navigation_timeout(30000)
 
+            # 预热空白页面池（在注册监听器之前创建，不会触发新页面回调）
+            await self._fill_page_pool()
+
             # 设置页面事件监听
             await self._setup_page_listeners()
 
+            # 在导航之前注册鼠标动画脚本，目标网站加载时即已安装
+            await self._install_mouse_move_script()
+
             # Navigate to the website
             if self.website_url:
                 await self.navigate(self.website_url)
@@ -117,7 +406,7 @@ class BrowserController:
 
         except Exception as e:
             self.logger.error(f"Failed to initialize browser: {e}")
-            await self.cleanup()
+            await self.hard_cleanup()
             raise BrowserOperationError(f"Browser initialization failed: {str(e)}")
 
     async def _setup_page_listeners(self):
@@ -127,33 +416,35 @@ class BrowserController:
 
         # 监听新页面打开事件
         self._context.on("page", self._on_new_page)
+
+        # 对话框在 context 上统一监听，无需逐页注册
+        self._context.on("dialog", self._on_dialog)
         
         # 为当前页面添加加载事件监听
-        for page in self._pages:
+        for page in list(self._pages.values()):
             self._add_page_listeners(page)
 
     def _add_page_listeners(self, page):
         """为页面添加事件监听器"""
-        # 监听页面导航事件
-        page.on("load", lambda: asyncio.create_task(self._on_page_load(page)))
-        
-        # 可以添加更多事件监听器，如对话框、控制台消息等
-        page.on("dialog", lambda dialog: asyncio.create_task(self._on_dialog(dialog)))
+        if page in self._listened_pages:
+            return
+        self._listened_pages.add(page)
+
+        # 监听页面导航事件（同步回调，不为每次加载创建任务）
+        page.on("load", self._on_page_load)
 
-    async def _on_page_load(self, page):
+    def _on_page_load(self, page):
         """页面加载完成时的回调"""
         try:
-            # 如果加载的页面不在我们的列表中，添加它
-            if page not in self._pages:
-                self._pages.append(page)
+            # 如果加载的页面不在我们的列表中（且不是池中的空白页），添加它
+            if id(page) not in self._pages and page not in self._page_pool:
+                self._pages[id(page)] = page
                 self._add_page_listeners(page)
 
-            # 更新视口大小
             if page.is_closed():
                 return
 
-            await page.set_viewport_size({"width": 1280, "height": 720})
-            self.logger.info(f"Page loaded: {await page.title() if not page.is_closed() else 'unknown'}")
+            self.logger.info(f"Page loaded: {page.url}")
         except Exception as e:
             self.logger.error(f"Error in page load handler: {e}")
 
@@ -172,8 +463,9 @@ class BrowserController:
             self.logger.info("New page opened")
             
             # 添加到页面列表
-            if page not in self._pages:
-                self._pages.append(page)
+            is_new = id(page) not in self._pages
+            if is_new:
+                self._pages[id(page)] = page
                 
             # 为新页面添加事件监听器
             self._add_page_listeners(page)
@@ -188,28 +480,90 @@ class BrowserController:
             except TimeoutError:
                 self.logger.warning("Timeout waiting for new page to load")
                 
-            # 设置视口大小
             if not page.is_closed():
-                await page.set_viewport_size({"width": 1280, "height": 720})
-                title = await page.title() if not page.is_closed() else "unknown"
-                self.logger.info(f"Switched to new page: {title}")
+                # 视口只需在新页面首次出现时设置一次（context 已指定视口时无需设置）
+                if is_new and not self._context_has_viewport:
+                    await page.set_viewport_size(self.VIEWPORT)
+                await self._log_page_title("Switched to new page", page)
         except Exception as e:
             self.logger.error(f"Error handling new page: {e}")
 
+    async def _log_page_title(self, message: str, page: Page) -> None:
+        """以 INFO 级别记录页面标题；INFO 日志被过滤时不请求标题，省去一次 CDP 往返"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        title = "unknown" if page.is_closed() else await page.title()
+        self.logger.info(f"{message}: {title}")
+
     async def get_all_pages(self) -> List[Page]:
-        """获取所有打开的页面"""
-        if self._context:
-            # 刷新页面列表，删除已关闭的页面
-            self._pages = [page for page in self._context.pages if not page.is_closed()]
-        return self._pages
+        """获取所有打开的页面（不包括页面池中的空白页）"""
+        if not self._context:
+            return list(self._pages.values())
+        # 按 context 中的顺序返回，同时刷新记录，删除已关闭的页面
+        pages = [page for page in self._context.pages
+                 if not page.is_closed() and page not in self._page_pool]
+        self._pages = {id(page): page for page in pages}
+        return pages
+
+    def _page_pool_limit(self) -> int:
+        """
+        页面池容量：只有无头模式下预热的空白页不可见，才启用页面池。
+        有界面时（包括通过 CDP 连接的本地 Chrome）每个池中页面都是一个可见并抢占焦点的空白标签页，容量为 0，
+        被释放的页面直接关闭。
+        """
+        return self.PAGE_POOL_SIZE if self.headless and not self._browser_over_cdp else 0
+
+    async def _fill_page_pool(self) -> None:
+        """创建空白页面填充页面池"""
+        while len(self._page_pool) < self._page_pool_limit():
+            page = await self._context.new_page()
+            if not self._context_has_viewport:
+                await page.set_viewport_size(self.VIEWPORT)
+            self._page_pool.append(page)
+
+    async def acquire_page(self) -> Page:
+        """获取一个可用的标签页：优先复用页面池中的空白页，池为空时新建"""
+        while self._page_pool:
+            page = self._page_pool.pop()
+            if not page.is_closed():
+                self._pages[id(page)] = page
+                self._add_page_listeners(page)
+                return page
+        page = await self._context.new_page()
+        if id(page) not in self._pages and not self._context_has_viewport:
+            await page.set_viewport_size(self.VIEWPORT)
+        self._pages[id(page)] = page
+        return page
+
+    async def _release_page(self, page: Page) -> None:
+        """将页面重置为空白页并放回页面池，池已满时直接关闭"""
+        if len(self._page_pool) >= self._page_pool_limit():
+            await page.close()
+            return
+        # 先放入池中，避免 about:blank 的 load 事件把它重新加入页面列表
+        self._page_pool.append(page)
+        try:
+            await page.goto('about:blank')
+        except Exception:
+            self._page_pool.remove(page)
+            await page.close()
+
+    async def _close_page_pool(self) -> None:
+        """关闭页面池中的所有空白页"""
+        pool, self._page_pool = self._page_pool, []
+        for page in pool:
+            try:
+                if not page.is_closed():
+                    await page.close()
+            except Exception:
+                pass
 
     async def switch_to_page(self, page_index: int) -> None:
         """切换到指定索引的页面"""
         pages = await self.get_all_pages()
         if 0 <= page_index < len(pages):
             self._page = pages[page_index]
-            title = await self._page.title() if not self._page.is_closed() else "unknown"
-            self.logger.info(f"Switched to page {page_index}: {title}")
+            await self._log_page_title(f"Switched to page {page_index}", self._page)
         else:
             raise BrowserOperationError(f"Invalid page index: {page_index}. Total pages: {len(pages)}")
 
@@ -218,8 +572,7 @@ class BrowserController:
         pages = await self.get_all_pages()
         if len(pages) > 0:
             self._page = pages[-1]  # 最后一个页面通常是最新打开的
-            title = await self._page.title() if not self._page.is_closed() else "unknown"
-            self.logger.info(f"Switched to latest page: {title}")
+            await self._log_page_title("Switched to latest page", self._page)
         else:
             raise BrowserOperationError("No pages available")
 
@@ -234,8 +587,8 @@ class BrowserController:
         if current_index == -1:
             return
         
-        # 关闭当前页面
-        await self._page.close()
+        # 回收当前页面（重置为空白页放回页面池）
+        await self._release_page(self._page)
         
         # 更新页面列表
         pages = await self.get_all_pages()
@@ -244,13 +597,11 @@ class BrowserController:
         if pages:
             new_index = min(current_index, len(pages) - 1)
             self._page = pages[new_index]
-            title = await self._page.title() if not self._page.is_closed() else "unknown"
-            self.logger.info(f"Switched to page {new_index} after closing previous page: {title}")
+            await self._log_page_title(f"Switched to page {new_index} after closing previous page", self._page)
         else:
-            # 如果没有页面了，创建一个新页面
-            self._page = await self._context.new_page()
-            self._pages = [self._page]
-            self.logger.info("Created new page after closing last page")
+            # 如果没有页面了，从页面池取出或创建一个新页面
+            self._page = await self.acquire_page()
+            self.logger.info("Opened new page after closing last page")
             
     async def _wait(self, t=None):
         """Wait for a specified time"""
@@ -258,21 +609,112 @@ class BrowserController:
             t = self.WAIT_TIME
         await asyncio.sleep(t)
 
-    async def navigate(self, url: str) -> None:
-        """Navigate to a URL"""
+    async def _wait_for_dom_ready(self, timeout: int = 5000) -> bool:
+        """
+        等待当前页面 DOM 就绪，替代固定时长的等待
+        :param timeout: 超时时间（毫秒）
+        :return: 是否在超时前就绪
+        """
+        try:
+            await self._page.wait_for_load_state("domcontentloaded", timeout=timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def _perform_and_settle(self, operation) -> Optional[Page]:
+        """
+        执行可能触发导航的输入操作（点击、回车、快捷键等），并等待由它引起的导航或新标签页加载完成。
+        输入事件刚发出时 readyState 仍是旧文档的 complete，新标签页的 page 事件也是异步到达的，
+        因此在操作前注册监听，操作后最多等待 NAVIGATION_SETTLE_TIME 秒观察：
+        打开了新标签页则等待其 DOM 就绪；主框架发起了导航则等待新文档提交并 DOM 就绪。
+        :param operation: 执行输入操作的协程
+        :return: 操作打开的新页面，没有打开时返回 None
+        """
+        page = self._page
+        context = self._context
+        loop = asyncio.get_running_loop()
+        nav_started = loop.create_future()
+        nav_committed = loop.create_future()
+        page_opened = loop.create_future()
+
+        def on_request(request):
+            try:
+                is_main_navigation = request.is_navigation_request() and request.frame == page.main_frame
+            except Exception:  # Service Worker 发起的请求没有所属框架
+                return
+            if is_main_navigation and not nav_started.done():
+                nav_started.set_result(None)
+
+        def on_frame_navigated(frame):
+            if frame == page.main_frame and not nav_committed.done():
+                nav_committed.set_result(None)
+
+        def on_page(new_page):
+            if not page_opened.done():
+                page_opened.set_result(new_page)
+
+        page.on("request", on_request)
+        page.on("framenavigated", on_frame_navigated)
+        context.on("page", on_page)
+        try:
+            await operation
+            done, _ = await asyncio.wait({nav_started, nav_committed, page_opened},
+                                         timeout=self.NAVIGATION_SETTLE_TIME)
+            if not done:
+                return None  # 操作既没有引起导航，也没有打开新页面
+            if not page_opened.done():
+                try:
+                    await asyncio.wait_for(nav_committed, self.NAVIGATION_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.logger.warning("Timeout waiting for navigation to commit, continuing anyway")
+                    return None
+        finally:
+            page.remove_listener("request", on_request)
+            page.remove_listener("framenavigated", on_frame_navigated)
+            context.remove_listener("page", on_page)
+
+        if page_opened.done():
+            # 新页面的切换由 context 的 page 事件回调完成，这里只等待它加载
+            new_page = page_opened.result()
+            self.logger.info("New page detected after input, waiting for it to load")
+            try:
+                await new_page.wait_for_load_state("domcontentloaded", timeout=self.NAVIGATION_TIMEOUT * 1000)
+            except TimeoutError:
+                self.logger.warning("Timeout waiting for new page to load, continuing anyway")
+            return new_page
+
+        if not await self._wait_for_dom_ready():
+            self.logger.warning("Timeout waiting for page to load after input, continuing anyway")
+        return None
+
+    async def navigate(self, url: str, wait_until: str = "load", settle_timeout: int = 3000) -> None:
+        """
+        Navigate to a URL
+
+        :param url: 目标地址
+        :param wait_until: DOM 就绪后额外等待的加载状态（"load" / "networkidle"），为 None 时不再等待
+        :param settle_timeout: 额外等待的超时时间（毫秒），超时后继续执行
+        """
         if not url:
             self.logger.warning("Empty URL provided to navigate")
             return
             
         try:
             self.logger.info(f"Navigating to: {url}")
-            response = await self._page.goto(url, wait_until="domcontentloaded")
+            response = await self._page.goto(url, wait_until="domcontentloaded", timeout=15000)
             
-            # 尝试等待网络请求完成，但不让它阻塞太久
-            try:
-                await self._page.wait_for_load_state("networkidle", timeout=10000)
-            except TimeoutError:
-                self.logger.warning("Timeout waiting for network idle, continuing anyway")
+            # 尽力等待指定的加载状态，但不让它阻塞太久（networkidle 在长连接页面上可能永远不会到达）
+            host = urlparse(url).netloc
+            if wait_until == "networkidle" and host in self._never_idle_hosts:
+                # 该站点此前从未进入 networkidle（WebSocket/SSE/统计上报等长连接），直接降级为 load
+                wait_until = "load"
+            if wait_until and wait_until != "domcontentloaded":
+                try:
+                    await self._page.wait_for_load_state(wait_until, timeout=settle_timeout)
+                except TimeoutError:
+                    self.logger.warning(f"Timeout waiting for '{wait_until}' state, continuing anyway")
+                    if wait_until == "networkidle":
+                        self._never_idle_hosts.add(host)
                 
             if not response:
                 self.logger.warning(f"Navigation to {url} did not return a response.")
@@ -308,107 +750,82 @@ class BrowserController:
 
     async def _process_action(self, action: Action) -> None:
         """操作指令路由"""
-        handlers = {
-            'click': self._handle_click,
-            'left_double': self._handle_double_click,
-            'right_single': self._handle_right_click,
-            'drag': self._handle_drag,
-            'hotkey': self._handle_hotkey,
-            'type': self._handle_type,
-            'scroll': self._handle_scroll,
-            'switch_tab': self._handle_switch_tab,
-        }
         try:
-            handler = handlers[action.action_type]
+            handler = self._handlers[action.action_type]
         except KeyError:
-            raise ValueError(f"Invalid action type: {action.action_type}. Valid types: {', '.join(handlers.keys())}")
+            raise ValueError(f"Invalid action type: {action.action_type}. Valid types: {', '.join(self._handlers.keys())}")
         await handler(action)
 
+    async def _dispatch_mouse_events(self, events: List[Dict[str, Any]]) -> None:
+        """
+        通过 CDP 连续发送一组鼠标事件，不在事件之间等待各自的响应
+        （CDP 在同一会话内按顺序处理消息，整组只需一次往返的等待）
+        """
+        cdp = await self._get_cdp_session()
+        await asyncio.gather(*(cdp.send('Input.dispatchMouseEvent', event) for event in events))
+
+    async def _cdp_click(self, x: float, y: float, button: str = 'left', click_count: int = 1) -> None:
+        """通过 CDP 在指定坐标点击，移动、按下、抬起一次性发出"""
+        buttons = {'left': 1, 'right': 2, 'middle': 4}[button]
+        events = [{'type': 'mouseMoved', 'x': x, 'y': y}]
+        for count in range(1, click_count + 1):
+            events.append({'type': 'mousePressed', 'x': x, 'y': y, 'button': button,
+                           'buttons': buttons, 'clickCount': count})
+            events.append({'type': 'mouseReleased', 'x': x, 'y': y, 'button': button, 'clickCount': count})
+        await self._dispatch_mouse_events(events)
+
     async def _handle_click(self, action: Action) -> None:
         """处理点击操作"""
-        center = Action.calculate_center(action.start_box)
-        await self._show_mouse_move(*center)
+        center = action.center
+        if self._show_cursor_animation:
+            await self._show_mouse_move(*center)
         
-        # 保存点击前的页面数量
-        before_pages = len(await self.get_all_pages())
-        
-        # 执行点击
-        await self._page.mouse.click(*center)
-        await self._wait(0.5)
-        
-        # 检查是否有新页面打开
-        after_pages = len(await self.get_all_pages())
-        if after_pages > before_pages:
-            self.logger.info("New page detected after click, waiting for it to load")
-            # 等待新页面加载
-            await self._wait(1.0)
-        
-        # 等待页面加载状态
-        try:
-            await self._page.wait_for_load_state("domcontentloaded", timeout=5000)
-        except TimeoutError:
-            self.logger.warning("Timeout waiting for page to load after click, continuing anyway")
+        # 执行点击，并等待点击引起的导航或新标签页加载完成
+        await self._perform_and_settle(self._cdp_click(*center))
 
     async def _handle_double_click(self, action: Action) -> None:
         """处理双击操作"""
-        center = Action.calculate_center(action.start_box)
-        await self._show_mouse_move(*center)
-        await self._page.mouse.click(*center, click_count=2)
-        await self._wait()
-        
-        # 等待页面加载状态
-        try:
-            await self._page.wait_for_load_state("domcontentloaded", timeout=5000)
-        except TimeoutError:
-            pass
+        center = action.center
+        if self._show_cursor_animation:
+            await self._show_mouse_move(*center)
+        # 双击可能触发导航，等待页面加载
+        await self._perform_and_settle(self._cdp_click(*center, click_count=2))
 
     async def _handle_right_click(self, action: Action) -> None:
         """处理右键操作"""
-        center = Action.calculate_center(action.start_box)
-        await self._show_mouse_move(*center)
-        await self._page.mouse.click(*center, button='right')
-        await self._wait()
+        center = action.center
+        if self._show_cursor_animation:
+            await self._show_mouse_move(*center)
+        await self._cdp_click(*center, button='right')
 
     async def _handle_drag(self, action: Action) -> None:
         """处理拖拽操作"""
-        start = Action.calculate_center(action.start_box)
-        end = Action.calculate_center(action.end_box)
+        start = action.center
+        end = action.end_center
+        # 拖拽必须经过 Playwright 的鼠标接口：它会拦截并转发 HTML5 拖放事件，直接发送 CDP 鼠标事件无法触发拖放
         await self._page.mouse.move(*start)
         await self._page.mouse.down()
         await self._page.mouse.move(*end)
         await self._page.mouse.up()
-        await self._wait()
 
     async def _handle_hotkey(self, action: Action) -> None:
         """处理快捷键操作"""
-        await self._page.keyboard.press(action.key)
-        await self._wait()
-        
         # 部分快捷键可能触发导航，等待页面加载
-        try:
-            await self._page.wait_for_load_state("domcontentloaded", timeout=5000)
-        except TimeoutError:
-            pass
+        await self._perform_and_settle(self._page.keyboard.press(action.key))
 
     async def _handle_type(self, action: Action) -> None:
         """处理输入操作"""
         content, submit = action.parse_content()
         await self._page.keyboard.type(content)
         if submit:
-            await self._page.keyboard.press('Enter')
             # 提交表单可能触发导航，等待页面加载
-            try:
-                await self._page.wait_for_load_state("domcontentloaded", timeout=5000)
-            except TimeoutError:
-                pass
-        await self._wait()
+            await self._perform_and_settle(self._page.keyboard.press('Enter'))
 
     async def _handle_scroll(self, action: Action) -> None:
         """处理滚动操作"""
-        center = Action.calculate_center(action.start_box)
+        center = action.center
         await self._page.mouse.move(*center)
         await self._page.mouse.wheel(*action.deltas)
-        await self._wait()
         
     async def _handle_switch_tab(self, action: Action) -> None:
         """处理标签页切换"""
@@ -418,7 +835,38 @@ class BrowserController:
         else:
             # 默认切换到最新标签页
             await self.switch_to_new_page()
-        await self._wait(0.5)
+
+    def _load_mouse_svg(self) -> str:
+        """读取鼠标 SVG 图标并编码为 data URL，读取失败时返回备用图像"""
+        try:
+            with open(get_absolute_path("/icon/mouse.svg"), "rb") as f:
+                svg_data = f.read()
+            svg_base64 = base64.b64encode(svg_data).decode("utf-8")
+            return f"data:image/svg+xml;base64,{svg_base64}"
+        except Exception as e:
+            self.logger.error(f"Failed to load mouse SVG: {str(e)}")
+            # 使用备用图像URL作为fallback
+            return "data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCAzMCAzMCI+PHBhdGggZD0iTTEyIDI0LjQyMkwyLjUgMTQuOTIyVjMuNUgyNS41VjI1LjVIMTJWMjQuNDIyWiIgc3Ryb2tlPSJibGFjayIgc3Ryb2tlLXdpZHRoPSIyIiBmaWxsPSJ3aGl0ZSIvPjwvc3ZnPg=="
+
+    def _mouse_move_init_script(self) -> str:
+        """构造鼠标动画初始化脚本：把动画函数和鼠标图标安装到 window 上，之后每次只需传坐标"""
+        # 鼠标图标只在首次使用时读取并编码，之后所有实例共享
+        if BrowserController._mouse_svg_url is None:
+            BrowserController._mouse_svg_url = self._load_mouse_svg()
+        # 以 void 0 结束，使脚本的值为 undefined：否则 evaluate 会把最后赋值的箭头函数当作函数无参调用
+        return (f"window.__browseticMouseSvg = {json.dumps(BrowserController._mouse_svg_url)};"
+                f"window.__browseticMouseMove = {self._MOUSE_MOVE_JS};"
+                f"void 0;")
+
+    async def _install_mouse_move_script(self) -> None:
+        """在 context 上注册鼠标动画初始化脚本（每个 context 一次），之后加载的页面都会预先安装动画函数"""
+        if not self._show_cursor_animation or self._mouse_init_context is self._context:
+            return
+        try:
+            await self._context.add_init_script(self._mouse_move_init_script())
+            self._mouse_init_context = self._context
+        except Exception as e:
+            self.logger.warning(f"Failed to register mouse move script: {e}")
 
     async def _show_mouse_move(self, x: int, y: int) -> None:
         """
@@ -428,75 +876,15 @@ class BrowserController:
         :return: None
         """
         try:
-            # 获取当前视口尺寸
-            viewport_size = await self._page.evaluate("({ width: window.innerWidth, height: window.innerHeight })")
-            screen_width = viewport_size['width']
-            screen_height = viewport_size['height']
+            await self._install_mouse_move_script()
 
-            # 计算初始移动方向（基于目标点与视口中心的相对位置）
-            dx = -200 if x < screen_width / 2 else 200  # 横向偏移量
-            dy = -200 if y < screen_height / 2 else 200  # 纵向偏移量
-            rotate = 30 if dx > 0 else -30  # 根据方向设置旋转角度
+            # 只传坐标调用已安装的函数；注册前就已加载的页面（如已有的标签页）在首次使用时补装一次
+            if not await self._page.evaluate(self._MOUSE_MOVE_CALL_JS, [x, y]):
+                await self._page.evaluate(self._mouse_move_init_script())
+                await self._page.evaluate(self._MOUSE_MOVE_CALL_JS, [x, y])
 
-            # 读取SVG文件
-            try:
-                with open(get_absolute_path("/icon/mouse.svg"), "rb") as f:
-                    svg_data = f.read()
-                svg_base64 = base64.b64encode(svg_data).decode("utf-8")
-                svg_url = f"data:image/svg+xml;base64,{svg_base64}"
-            except Exception as e:
-                self.logger.error(f"Failed to load mouse SVG: {str(e)}")
-                # 使用备用图像URL作为fallback
-                svg_url = "data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCAzMCAzMCI+PHBhdGggZD0iTTEyIDI0LjQyMkwyLjUgMTQuOTIyVjMuNUgyNS41VjI1LjVIMTJWMjQuNDIyWiIgc3Ryb2tlPSJibGFjayIgc3Ryb2tlLXdpZHRoPSIyIiBmaWxsPSJ3aGl0ZSIvPjwvc3ZnPg=="
-
-            # JavaScript代码中的字符串需要使用单引号，并使用f-string将Python变量正确注入
-            js_code = f"""
-                () => {{
-                    // 移除任何已存在的鼠标动画元素
-                    const existingMouse = document.getElementById('animated-mouse');
-                    if (existingMouse) existingMouse.remove();
-
-                    // 创建新的鼠标元素
-                    const moveImg = document.createElement('img');
-                    moveImg.id = 'animated-mouse';
-                    moveImg.src = '{svg_url}';
-
-                    // 设置元素基础样式
-                    moveImg.style.position = 'fixed'; // 使用fixed而不是absolute，以避免滚动问题
-                    moveImg.style.width = '30px';
-                    moveImg.style.height = '30px';
-                    moveImg.style.zIndex = '9999';
-                    moveImg.style.pointerEvents = 'none';
-
-                    // 设置初始位置（基于目标位置和偏移量计算）
-                    const startX = {x} + {dx};
-                    const startY = {y} + {dy};
-                    moveImg.style.left = startX - 15 + 'px';
-                    moveImg.style.top = startY - 15 + 'px';
-                    moveImg.style.transform = 'rotate({rotate}deg) scale(0.3)';
-
-                    document.body.appendChild(moveImg);
-
-                    // 确保DOM更新后再开始动画
-                    setTimeout(() => {{
-                        moveImg.style.transition = 'all 0.6s cubic-bezier(0.34, 1.56, 0.64, 1)';
-                        moveImg.style.left = '{x - 15}px';
-                        moveImg.style.top = '{y - 15}px';
-                        moveImg.style.transform = 'rotate(0deg) scale(1)';
-                    }}, 10);
-
-                    // 动画结束后移除元素
-                    setTimeout(() => {{
-                        moveImg.remove();
-                    }}, 1200);
-                }}
-            """
-
-            # 执行JavaScript代码
-            await self._page.evaluate(js_code)
-
-            # 等待动画完成（0.6秒动画时间 + 0.2秒缓冲）
-            await self._wait(0.8)
+            # 动画在页面中自行完成，不必等待其结束；只短暂让出时间使动画先于点击开始
+            await self._wait()
 
         except Exception as e:
             self.logger.error(f"Failed to show mouse move animation to ({x}, {y}): {str(e)}")
@@ -504,8 +892,7 @@ class BrowserController:
     async def click(self, coordinates: Coordinate) -> None:
         """Click at specific coordinates"""
         try:
-            await self._page.mouse.click(coordinates.x, coordinates.y)
-            await asyncio.sleep(0.5)
+            await self._perform_and_settle(self._page.mouse.click(coordinates.x, coordinates.y))
         except Exception as e:
             self.logger.error(f"Failed to click at coordinates {coordinates}: {e}")
             raise BrowserOperationError(f"Click operation failed: {str(e)}")
@@ -513,8 +900,7 @@ class BrowserController:
     async def click_element(self, selector: str) -> None:
         """Click an element by selector"""
         try:
-            await self._page.click(selector)
-            await asyncio.sleep(0.5)
+            await self._perform_and_settle(self._page.click(selector))
         except Exception as e:
             self.logger.error(f"Failed to click element with selector {selector}: {e}")
             raise BrowserOperationError(f"Click element operation failed: {str(e)}")
@@ -552,10 +938,16 @@ class BrowserController:
             self.logger.error(f"Failed to get page info: {e}")
             return {"error": str(e)}
 
-    async def _capture_screenshot(self, is_full_page=False) -> bytes:
-        """页面截图捕获"""
+    async def _capture_screenshot(self, is_full_page=False, path: Optional[str] = None, fmt: str = "png") -> bytes:
+        """
+        页面截图捕获
+        :param is_full_page: 是否截取整页
+        :param path: 指定时由 Playwright 直接写入该文件，无需调用方再写盘
+        :param fmt: 图片格式（"png" / "jpeg"），jpeg 使用 80 质量压缩
+        """
         try:
-            screenshot = await self._page.screenshot(full_page=is_full_page)
+            screenshot = await self._page.screenshot(full_page=is_full_page, path=path, type=fmt,
+                                                     quality=80 if fmt == "jpeg" else None)
             self.logger.debug("Screenshot captured successfully")
             return screenshot
         except Exception as e:
@@ -574,13 +966,51 @@ class BrowserController:
             self.logger.error(f"HTML capture failed: {str(e)}")
             raise
 
-    async def _capture_js(self) -> str:
+    async def _get_cdp_session(self):
+        """获取当前页面的 CDP 会话，页面切换后重新创建"""
+        if self._cdp is None or self._cdp_page is not self._page:
+            if self._cdp is not None:
+                try:
+                    await self._cdp.detach()
+                except Exception:
+                    pass
+            self._cdp = await self._context.new_cdp_session(self._page)
+            self._cdp_page = self._page
+        return self._cdp
+
+    async def _cdp_evaluate(self, expression: str):
+        """通过 CDP Runtime.evaluate 执行表达式并按值返回结果"""
+        cdp = await self._get_cdp_session()
+        result = await cdp.send('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+        if 'exceptionDetails' in result:
+            raise BrowserOperationError(f"Runtime.evaluate failed: {result['exceptionDetails'].get('text')}")
+        return result['result'].get('value')
+
+    async def _capture_js(self) -> List[Dict[str, Any]]:
         """
-        捕获页面中所有 script 标签内的 JavaScript 代码
+        捕获页面中所有 script 标签的元信息（src、type、长度及前 256 个字符），不传输完整脚本内容
         """
         try:
-            js = await self._page.evaluate(
-                "() => { return Array.from(document.scripts).map(script => script.textContent).join('\\n'); }"
+            js = await self._cdp_evaluate(
+                "Array.from(document.scripts).map(script => ({"
+                "src: script.src || null, type: script.type || 'text/javascript', "
+                "length: (script.textContent || '').length, head: (script.textContent || '').slice(0, 256)}))"
+            )
+            self.logger.debug("JS metadata captured successfully")
+            return js
+        except Exception as e:
+            self.logger.error(f"JS capture failed: {str(e)}")
+            raise
+
+    async def _capture_js_full(self, indices: List[int]) -> List[str]:
+        """
+        按需捕获指定 script 标签的完整代码（每段在浏览器端截断到 MAX_JS_CHARS）
+        :param indices: document.scripts 中的脚本索引，对应 _capture_js 返回列表的下标
+        """
+        try:
+            js = await self._cdp_evaluate(
+                f"{json.dumps(list(indices))}.map(i => document.scripts[i] ? "
+                f"(document.scripts[i].textContent || '').slice(0, {self.MAX_JS_CHARS}) : null)"
             )
             self.logger.debug("JS captured successfully")
             return js
@@ -590,25 +1020,44 @@ class BrowserController:
 
     async def _capture_text(self) -> str:
         """
-        捕获页面上所有可见的文本内容
+        捕获页面上所有可见的文本内容（在浏览器端截断到 MAX_TEXT_CHARS）
         """
         try:
-            text = await self._page.inner_text("body")
+            text = await self._cdp_evaluate(f"({self._VISIBLE_TEXT_JS})({self.MAX_TEXT_CHARS})")
             self.logger.debug("Text captured successfully")
             return text
         except Exception as e:
             self.logger.error(f"Text capture failed: {str(e)}")
             raise
 
-    async def save_page_info(self) -> dict:
-        screenshot = await self._capture_screenshot()
-        html = await self._capture_html()
-        js = await self._capture_js()
-        text = await self._capture_text()
-        img_base64 = base64.b64encode(screenshot).decode("utf-8")
-        
-        # 获取页面元信息
-        page_info = await self.get_current_page_info()
+    async def _none(self) -> None:
+        """占位协程，用于跳过未请求的捕获项"""
+        return None
+
+    async def save_page_info(self, include_js: bool = False, include_html: bool = True,
+                             full_page: bool = False, include_base64: bool = True,
+                             screenshot_format: str = "png") -> dict:
+        """
+        捕获当前页面信息
+        :param include_js: 是否捕获页面脚本（体积可能很大，默认不捕获）
+        :param include_html: 是否捕获页面 HTML
+        :param full_page: 是否截取整页
+        :param include_base64: 是否附带截图的 base64 编码（img_base64）
+        :param screenshot_format: 截图格式（"png" / "jpeg"），jpeg 体积更小，适合发送给大模型
+        :return: 页面信息字典，未捕获的项为 None
+        """
+        # 先建立 CDP 会话，避免并发捕获时重复创建
+        await self._get_cdp_session()
+
+        # 各项捕获相互独立，并发执行，耗时取决于最慢的一项
+        screenshot, html, js, text, page_info = await asyncio.gather(
+            self._capture_screenshot(full_page, fmt=screenshot_format),
+            self._capture_html() if include_html else self._none(),
+            self._capture_js() if include_js else self._none(),
+            self._capture_text(),
+            self.get_current_page_info()  # 获取页面元信息
+        )
+        img_base64 = self._encode_screenshot(screenshot) if include_base64 else None
         
         return {
             'html': html, 
@@ -616,9 +1065,17 @@ class BrowserController:
             'text': text, 
             'img_base64': img_base64, 
             'screenshot': screenshot,
+            'img_mime': f'image/{screenshot_format}',
             'page_info': page_info
         }
 
+    def _encode_screenshot(self, screenshot: bytes) -> str:
+        """把截图编码为 base64；与上一张截图完全相同时（如等待、页面未变化）直接复用上次的结果"""
+        if screenshot != self._last_screenshot:
+            self._last_img_base64 = _b64encode(screenshot).decode("ascii")
+            self._last_screenshot = screenshot
+        return self._last_img_base64
+
     async def execute_javascript(self, script: str):
         """Execute JavaScript in the browser context"""
         try:
@@ -629,10 +1086,43 @@ class BrowserController:
             raise BrowserOperationError(f"JavaScript evaluation failed: {str(e)}")
 
     async def cleanup(self) -> None:
-        """Clean up resources"""
+        """Clean up resources; in session mode only reset the current page and keep the browser alive"""
+        if self._session_mode and self._is_session_alive():
+            try:
+                if self._page and not self._page.is_closed():
+                    await self._page.goto('about:blank')
+                self.logger.info("Browser session kept alive for reuse")
+                return
+            except Exception as e:
+                self.logger.warning(f"Failed to reset page in session mode, tearing down: {e}")
+        await self.hard_cleanup()
+
+    def _terminate_chrome_process(self) -> None:
+        """终止由本实例启动的 Chrome 进程"""
+        # Only terminate the process if we started it
+        if self.chrome_process and self.use_local_chrome:
+            try:
+                self.chrome_process.terminate()
+                self.chrome_process = None
+                self._remove_chrome_pid_file()
+            except Exception as e:
+                self.logger.warning(f"Failed to terminate Chrome process: {e}")
+
+    async def hard_cleanup(self) -> None:
+        """Tear down page, context, browser and Playwright unconditionally"""
         try:
-            # 清理页面列表
-            self._pages = []
+            # 清理页面列表；池中的空白页需要显式关闭，否则附加到已有浏览器时会残留为标签页
+            self._pages = {}
+            await self._close_page_pool()
+            self._listened_pages = set()
+
+            if self._cdp:
+                try:
+                    await self._cdp.detach()
+                except:
+                    pass
+                self._cdp = None
+                self._cdp_page = None
             
             if self._page:
                 try:
@@ -648,6 +1138,12 @@ class BrowserController:
                 except:
                     pass
                 self._context = None
+                self._context_has_viewport = False
+
+            if self._share_browser:
+                # 共享的 Browser 与 Playwright 由 shutdown_shared() 关闭
+                self._browser = None
+                self._playwright = None
 
             if self._browser:
                 try:
@@ -663,13 +1159,7 @@ class BrowserController:
                     pass
                 self._playwright = None
 
-            # Only terminate the process if we started it
-            if self.chrome_process and self.use_local_chrome:
-                try:
-                    self.chrome_process.terminate()
-                    self.chrome_process = None
-                except Exception as e:
-                    self.logger.warning(f"Failed to terminate Chrome process: {e}")
+            self._terminate_chrome_process()
 
             self.logger.info("Browser controller cleaned up")
         except Exception as e:
@@ -685,10 +1175,45 @@ if __name__ == "__main__":
         await agent.initialize()
 
         screenshot_count = 1  # 初始化截图计数器
+        # 动作执行后的截图任务，与下一轮用户输入并行进行
+        pending_screenshot: Optional[asyncio.Task] = None
+        # 尚未完成的截图写盘任务，在线程池中执行，退出前统一等待
+        pending_writes: set = set()
+
+        async def ainput(prompt: str) -> str:
+            """在线程中读取用户输入，避免阻塞事件循环"""
+            return await asyncio.to_thread(input, prompt)
+
+        async def write_screenshot(path: str, data: bytes) -> None:
+            """在线程中写入截图文件，不阻塞事件循环"""
+            try:
+                await asyncio.to_thread(pathlib.Path(path).write_bytes, data)
+                print(f"截图已保存到 {path}")
+            except Exception as e:
+                print(f"保存截图失败：{e}")
+
+        async def flush_pending_screenshot() -> None:
+            """等待上一次动作的截图完成，并把写盘任务提交到后台"""
+            nonlocal pending_screenshot, screenshot_count
+            if pending_screenshot is None:
+                return
+            task, pending_screenshot = pending_screenshot, None
+            screenshot_path = f"screenshot_{screenshot_count}.png"
+            try:
+                data = await task
+            except Exception as e:
+                print(f"截图失败：{e}")
+                return
+            screenshot_count += 1
+            write = asyncio.create_task(write_screenshot(screenshot_path, data))
+            pending_writes.add(write)
+            write.add_done_callback(pending_writes.discard)
 
         while True:
-            action_type = input(
-                "请输入操作类型（click, left_double, right_single, drag, hotkey, type, scroll, screenshot, tabs, exit）：")
+            input_task = asyncio.create_task(ainput(
+                "请输入操作类型（click, left_double, right_single, drag, hotkey, type, scroll, screenshot, tabs, exit）："))
+            await flush_pending_screenshot()
+            action_type = await input_task
             
             if action_type == 'exit':
                 break
@@ -703,7 +1228,7 @@ if __name__ == "__main__":
                     current = "* " if page == agent._page else "  "
                     print(f"{current}[{i}] {title} - {url}")
                 
-                tab_cmd = input("请输入标签页操作 (switch <index>/new/close/refresh): ")
+                tab_cmd = await ainput("请输入标签页操作 (switch <index>/new/close/refresh): ")
                 if tab_cmd.startswith("switch "):
                     try:
                         idx = int(tab_cmd.split(" ")[1])
@@ -713,8 +1238,7 @@ if __name__ == "__main__":
                         print(f"切换标签页失败: {e}")
                 elif tab_cmd == "new":
                     try:
-                        new_page = await agent._context.new_page()
-                        agent._pages.append(new_page)
+                        new_page = await agent.acquire_page()
                         agent._page = new_page
                         await new_page.goto("https://www.baidu.com")
                         print("已创建新标签页")
@@ -737,43 +1261,45 @@ if __name__ == "__main__":
             if action_type == 'screenshot':
                 screenshot_path = f"screenshot_{screenshot_count}.png"  # 自动生成截图文件名
                 try:
-                    screenshot = await agent._capture_screenshot()
-                    with open(screenshot_path, "wb") as f:
-                        f.write(screenshot)
-                    print(f"截图已保存到 {screenshot_path}")
-                    screenshot_count += 1  # 计数器加一
+                    data = await agent._capture_screenshot()
                 except Exception as e:
                     print(f"截图失败：{e}")
+                    continue
+                screenshot_count += 1  # 计数器加一
+                # 与动作后的截图一样，在后台线程中写盘
+                write = asyncio.create_task(write_screenshot(screenshot_path, data))
+                pending_writes.add(write)
+                write.add_done_callback(pending_writes.discard)
                 continue
 
             # 使用 Action 类创建操作对象
             if action_type in ['click', 'left_double', 'right_single', 'scroll']:
-                start_box_str = input("请输入 start_box (例如：100,200,300,400)：")
+                start_box_str = await ainput("请输入 start_box (例如：100,200,300,400)：")
                 start_box = tuple(map(int, start_box_str.split(',')))
                 if action_type == 'scroll':
-                    deltas_str = input("请输入 deltas (例如：0,100)：")
+                    deltas_str = await ainput("请输入 deltas (例如：0,100)：")
                     deltas = tuple(map(int, deltas_str.split(',')))
                     action = Action(action_type, params={'start_box': start_box, 'deltas': deltas})
                 else:
                     action = Action(action_type, params={'start_box': start_box})
             elif action_type == 'drag':
-                start_box_str = input("请输入 start_box (例如：100,200,300,400)：")
+                start_box_str = await ainput("请输入 start_box (例如：100,200,300,400)：")
                 start_box = tuple(map(int, start_box_str.split(',')))
-                end_box_str = input("请输入 end_box (例如：500,600,700,800)：")
+                end_box_str = await ainput("请输入 end_box (例如：500,600,700,800)：")
                 end_box = tuple(map(int, end_box_str.split(',')))
                 action = Action(action_type, params={'start_box': start_box, 'end_box': end_box})
             elif action_type == 'hotkey':
-                key = input("请输入按键名称 (例如：Enter, Escape, a)：")
+                key = await ainput("请输入按键名称 (例如：Enter, Escape, a)：")
                 action = Action(action_type, params={'key': key})
             elif action_type == 'type':
-                content = input("请输入要输入的内容：")
-                submit_str = input("是否提交？(yes/no)：")
+                content = await ainput("请输入要输入的内容：")
+                submit_str = await ainput("是否提交？(yes/no)：")
                 submit = submit_str.lower() == 'yes'
                 if submit:
                     content += '\n'
                 action = Action(action_type, params={'content': content})
             elif action_type == 'switch_tab':
-                tab_idx_str = input("请输入要切换的标签页索引 (默认切换到最新标签页): ")
+                tab_idx_str = await ainput("请输入要切换的标签页索引 (默认切换到最新标签页): ")
                 if tab_idx_str:
                     try:
                         tab_idx = int(tab_idx_str)
@@ -789,21 +1315,15 @@ if __name__ == "__main__":
             try:
                 await agent.execute(action)
                 print("操作执行成功！")
-                # 每次操作后立即保存截图，自动编号
-                screenshot_path = f"screenshot_{screenshot_count}.png"
-                try:
-                    screenshot = await agent._capture_screenshot()
-                    with open(screenshot_path, "wb") as f:
-                        f.write(screenshot)
-                    print(f"截图已保存到 {screenshot_path}")
-                    screenshot_count += 1
-                except Exception as e:
-                    print(f"截图失败：{e}")
+                # 每次操作后在后台截图，与下一轮输入重叠，下一轮开始时自动编号保存
+                pending_screenshot = asyncio.create_task(agent._capture_screenshot())
             except BrowserOperationError as e:
                 print(f"操作执行失败：{e}")
             except Exception as e:
                 print(f"发生未知错误：{e}")
 
+        await flush_pending_screenshot()
+        await asyncio.gather(*pending_writes)
         await agent.shutdown()
 
 
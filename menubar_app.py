@@ -1,19 +1,99 @@
 import rumps
 import os
-import json
+import copy
 import subprocess
 import threading
 import asyncio
+import atexit
+import logging
+import logging.handlers
 import sys
+from PyObjCTools import AppHelper
 
-from PyQt6.QtWidgets import QApplication
 
-from agent import Agent
-from utils.dialog_window import *
+# 优先使用 orjson 序列化配置（C 实现，速度更快），未安装时回退到标准库 json
+# 平时以紧凑格式写入；仅在用户手动编辑配置文件前才输出带缩进的格式
+try:
+    import orjson
+
+    def _dumps(obj, pretty=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2) if pretty else orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(obj, pretty=False):
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    _loads = json.loads
+
+
+class _BufferedLogHandler(logging.handlers.MemoryHandler):
+    """
+    日志先缓存在内存中批量输出，避免频繁 print 争用 stdout。
+    遇到错误或缓存满时立即输出，其余记录最多延迟 FLUSH_DELAY 秒：
+    缓存由空变为非空时才启动一次性定时器，空闲时不会被唤醒。
+    """
+    FLUSH_DELAY = 1.0
+
+    def __init__(self, capacity, target):
+        super().__init__(capacity, flushLevel=logging.ERROR, target=target)
+        self._flush_timer = None
+
+    def emit(self, record):
+        # 由 Handler.handle() 在持有锁时调用
+        super().emit(record)
+        if self.buffer and self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.FLUSH_DELAY, self._timed_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _timed_flush(self):
+        self.acquire()
+        try:
+            self._flush_timer = None
+            self.flush()
+        finally:
+            self.release()
+
+
+logger = logging.getLogger("NewsFilter")
+logger.setLevel(logging.INFO)
+_log_handler = _BufferedLogHandler(capacity=128, target=logging.StreamHandler())
+logger.addHandler(_log_handler)
+logger.propagate = False
+# 菜单栏“退出”经 NSApp.terminate_ 结束进程，不会执行 atexit / logging.shutdown，退出前输出剩余的日志
+rumps.events.before_quit.register(_log_handler.flush)
 
 # 配置文件路径
 CONFIG_FILE = os.path.expanduser("~/newsfilter_config.json")
 
+# 配置文件格式版本：2 表示指令以 {名称: 内容} 字典保存、last_command 保存指令名称
+CONFIG_SCHEMA_VERSION = 2
+
+# 配置文件的内存缓存及其对应的修改时间，文件未变化时无需重新读取或重写
+_CONFIG_CACHE = None
+_CONFIG_MTIME = None
+
+
+def _atomic_write(path, data):
+    """先写入同目录下的临时文件再原子替换，写入中途失败不会损坏原文件"""
+    tmp_file = path + ".tmp"
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, path)
+    except BaseException:
+        # 写入或替换失败时清理残留的临时文件
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
 
 # ToDo 增加配置大模型功能
 class NewsFilterMenuBar(rumps.App):
@@ -32,22 +112,47 @@ class NewsFilterMenuBar(rumps.App):
             'idle': idle_icon_path,
             'working': working_icon_path
         }
+        # 预先解码图标图片，切换状态时直接复用，无需每次重新读取 PNG
+        self._icon_images = self._load_icon_images()
+        self._current_icon_state = 'idle'  # 当前显示的图标状态
 
-        # 初始化PyQt应用
-        self.qt_app = QApplication.instance()
-        if not self.qt_app:
-            self.qt_app = QApplication(sys.argv)
+        # PyQt 应用与 Agent 导入较慢，首次显示对话框或开始任务时才创建，加快菜单栏图标的启动
+        self.qt_app = None
 
         # 状态变量
         self.websites = []
         self.commands = {}  # 改为字典：{名称: 内容}
-        self.saved_configs = []  # 保存的配置组合 [(网站, 指令名称), ...]
+        # 保存的配置组合 {(网站, 指令名称): 菜单标题}，字典保持添加顺序，查重和删除均为 O(1)
+        self.saved_configs = {}
         self.current_website = ""
         self.current_website_name = ""
         self.current_command_name = ""  # 当前选择的指令名称
         self.task_running = False
+        self._current_future = None  # 正在进行的任务
+        self._last_agent_site = None  # 已设置给 Agent 的网站，相同时无需重复设置
+        self._task_lock = asyncio.Lock()  # 保证任务串行使用浏览器
         self.api_key = ""  # 存储API Key
         self.agent = None  # 初始化时不创建Agent实例
+        self._save_timer = None  # 延迟写入配置的定时器
+        self._pending_config = None  # 尚未写入磁盘的配置快照
+        self._last_state_hash = None  # 上次成功写入时的状态哈希
+        self._menu_cache = {}  # 菜单项缓存 {(类别, 标题): MenuItem}
+        self._status_item = None  # 状态显示菜单项
+        self._short_name_cache = {}  # 网站 -> 菜单栏显示的简短名称
+
+        # 常驻的后台事件循环，所有任务通过 run_coroutine_threadsafe 提交
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._run_loop, daemon=True).start()
+        self._loop_stopped = False  # 事件循环是否已在退出流程中停止
+        # 菜单栏“退出”经 NSApp.terminate_ 结束进程，不会执行 atexit，因此在 before_quit 事件中关闭；
+        # atexit 仅作为其他退出方式的兜底
+        rumps.events.before_quit.register(self._shutdown_loop)
+        atexit.register(self._shutdown_loop)
+        self._save_lock = threading.Lock()
+        # 退出时写入尚未落盘的配置：菜单栏“退出”经 NSApp.terminate_ 结束进程，不会执行 atexit，
+        # 因此在 rumps 的 before_quit 事件中写入，atexit 仅作为其他退出方式的兜底
+        rumps.events.before_quit.register(self._flush_save)
+        atexit.register(self._flush_save)
 
         # 加载已保存的配置
         self.load_config()
@@ -59,112 +164,158 @@ class NewsFilterMenuBar(rumps.App):
         if not self.api_key:
             self.configure_api_key(None)
 
-        self.agent = Agent(api_key=self.api_key)  # 传入API Key
+    def _cached_item(self, kind, title, callback=None):
+        """获取缓存的菜单项，不存在时创建；kind 区分同名但用途不同的菜单项"""
+        key = (kind, title)
+        item = self._menu_cache.get(key)
+        if item is None:
+            item = self._menu_cache[key] = rumps.MenuItem(title, callback=callback)
+        return item
+
+    def _cached_submenu(self, title):
+        """获取缓存的子菜单并清空其中的菜单项，以便重新填充"""
+        submenu = self._cached_item('submenu', title)
+        if len(submenu):
+            submenu.clear()
+        return submenu
+
+    def _evict_menu_items(self, keys):
+        """从缓存中移除已删除条目对应的菜单项"""
+        for key in keys:
+            self._menu_cache.pop(key, None)
+
+    def _remove_menu_entries(self, entries):
+        """从已构建的子菜单中移除菜单项，entries 为 [(子菜单标题, 菜单项标题), ...]"""
+        for submenu_title, title in entries:
+            submenu = self._menu_cache.get(('submenu', submenu_title))
+            if submenu is not None and title in submenu:
+                del submenu[title]
+
+    def _status_text(self):
+        """当前选择的状态文字，没有任何选择时返回空字符串"""
+        if not (self.current_website_name or self.current_command_name):
+            return ""
+        status = "当前: "
+        if self.current_website:
+            status += self.current_website_name
+        if self.current_website and self.current_command_name:
+            status += " | "
+        if self.current_command_name:
+            status += self.current_command_name
+        return status
+
+    def refresh_selection(self):
+        """只更新已有菜单项的选中状态和状态显示，不重建菜单结构"""
+        self.update_title()
+        for (kind, title), item in self._menu_cache.items():
+            if kind == 'website':
+                item.state = 1 if title == self.current_website else 0
+            elif kind == 'command':
+                item.state = 1 if title == self.current_command_name else 0
+            elif kind == 'config':
+                item.state = 1 if title == f"{self.current_website}: {self.current_command_name}" else 0
+
+        status = self._status_text()
+        if bool(status) != (self._status_item is not None):
+            # 状态显示需要新增或移除，属于结构变化
+            self.setup_menu()
+        elif self._status_item is not None:
+            self._status_item.title = status
 
     def setup_menu(self):
         """设置菜单结构"""
-        print("\n重建菜单结构")
+        logger.info("重建菜单结构")
 
         # 如果菜单中已存在退出按钮，保存它以便重新添加
         quit_item = None
         if "退出" in self.menu:
             quit_item = self.menu["退出"]
 
-        # 直接清空所有菜单项
+        # 直接清空所有菜单项（菜单项对象本身保留在缓存中复用）
         self.menu.clear()
 
         # 1. 我的配置（已保存的网站+指令组合）
         if self.saved_configs:
-            my_configs_menu = rumps.MenuItem("我的配置")
-            for site, cmd_name in self.saved_configs:
-                # 格式为 "网站: 指令名称"
-                config_name = f"{site}: {cmd_name}"
-                item = rumps.MenuItem(config_name, callback=self.select_saved_config)
-                if site == self.current_website and cmd_name == self.current_command_name:
-                    item.state = 1
+            my_configs_menu = self._cached_submenu("我的配置")
+            for (site, cmd_name), config_name in self.saved_configs.items():
+                item = self._cached_item('config', config_name, self.select_saved_config)
+                item.state = 1 if site == self.current_website and cmd_name == self.current_command_name else 0
                 my_configs_menu.add(item)
             self.menu.add(my_configs_menu)
-            print("已添加 '我的配置' 菜单")
+            logger.info("已添加 '我的配置' 菜单")
 
         # 2. 网站菜单
-        website_menu = rumps.MenuItem("我的网站")
+        website_menu = self._cached_submenu("我的网站")
         if self.websites:
             for site in self.websites:
-                item = rumps.MenuItem(site, callback=self.select_website)
-                if site == self.current_website:
-                    item.state = 1
+                item = self._cached_item('website', site, self.select_website)
+                item.state = 1 if site == self.current_website else 0
                 website_menu.add(item)
             website_menu.add(rumps.separator)  # 添加分隔线
-        website_menu.add(rumps.MenuItem("添加", callback=self.add_website))
+        website_menu.add(self._cached_item('add_website', "添加", self.add_website))
         self.menu.add(website_menu)
-        print("已添加 '网站' 菜单")
+        logger.info("已添加 '网站' 菜单")
 
         # 3. 指令菜单
-        command_menu = rumps.MenuItem("我的指令")
+        command_menu = self._cached_submenu("我的指令")
         if self.commands:
             for cmd_name in self.commands.keys():
-                item = rumps.MenuItem(cmd_name, callback=self.select_command)
-                if cmd_name == self.current_command_name:
-                    item.state = 1
+                item = self._cached_item('command', cmd_name, self.select_command)
+                item.state = 1 if cmd_name == self.current_command_name else 0
                 command_menu.add(item)
             command_menu.add(rumps.separator)  # 添加分隔线
-        command_menu.add(rumps.MenuItem("添加", callback=self.add_command))
+        command_menu.add(self._cached_item('add_command', "添加", self.add_command))
         self.menu.add(command_menu)
-        print("已添加 '指令' 菜单")
+        logger.info("已添加 '指令' 菜单")
 
         # 4. 任务操作
         self.menu.add(rumps.separator)
-        self.menu.add(rumps.MenuItem("开始任务", callback=self.start_task))
-        self.menu.add(rumps.MenuItem("保存当前配置", callback=self.save_current_config))
-        print("已添加任务操作菜单项")
+        self.menu.add(self._cached_item('action', "开始任务", self.start_task))
+        self.menu.add(self._cached_item('action', "取消任务", self.cancel_task))
+        self.menu.add(self._cached_item('action', "保存当前配置", self.save_current_config))
+        logger.info("已添加任务操作菜单项")
 
         # 5. 新增的删除菜单
         self.menu.add(rumps.separator)
-        delete_menu = rumps.MenuItem("删除")
+        delete_menu = self._cached_submenu("删除")
 
         # 删除指令子菜单
         if self.commands:
-            delete_commands_menu = rumps.MenuItem("删除指令")
+            delete_commands_menu = self._cached_submenu("删除指令")
             for cmd_name in self.commands.keys():
-                item = rumps.MenuItem(cmd_name, callback=self.delete_command)
-                delete_commands_menu.add(item)
+                delete_commands_menu.add(self._cached_item('delete_command', cmd_name, self.delete_command))
             delete_menu.add(delete_commands_menu)
 
         # 删除网站子菜单
         if self.websites:
-            delete_websites_menu = rumps.MenuItem("删除网站")
+            delete_websites_menu = self._cached_submenu("删除网站")
             for site in self.websites:
-                item = rumps.MenuItem(site, callback=self.delete_website)
-                delete_websites_menu.add(item)
+                delete_websites_menu.add(self._cached_item('delete_website', site, self.delete_website))
             delete_menu.add(delete_websites_menu)
 
         # 一键清空选项
-        delete_menu.add(rumps.MenuItem("一键清空", callback=self.clear_config))
+        delete_menu.add(self._cached_item('action', "一键清空", self.clear_config))
 
         self.menu.add(delete_menu)
-        print("已添加 '删除' 菜单")
+        logger.info("已添加 '删除' 菜单")
 
         # 6. 高级设置
         self.menu.add(rumps.separator)
-        advanced_menu = rumps.MenuItem("设置")
-        advanced_menu.add(rumps.MenuItem("配置API Key", callback=self.configure_api_key))
-        advanced_menu.add(rumps.MenuItem("编辑配置文件", callback=self.edit_config_file))
-        advanced_menu.add(rumps.MenuItem("查看日志", callback=self.open_logs))
+        advanced_menu = self._cached_submenu("设置")
+        advanced_menu.add(self._cached_item('action', "配置API Key", self.configure_api_key))
+        advanced_menu.add(self._cached_item('action', "编辑配置文件", self.edit_config_file))
+        advanced_menu.add(self._cached_item('action', "查看日志", self.open_logs))
         self.menu.add(advanced_menu)
-        print("已添加 '高级设置' 菜单")
+        logger.info("已添加 '高级设置' 菜单")
 
         # 7. 显示当前状态
-        if self.current_website_name or self.current_command_name:
-            status = "当前: "
-            if self.current_website:
-                status += self.current_website_name
-            if self.current_website and self.current_command_name:
-                status += " | "
-            if self.current_command_name:
-                status += self.current_command_name
+        self._status_item = None
+        status = self._status_text()
+        if status:
+            self._status_item = rumps.MenuItem(status, callback=None)
             self.menu.add(rumps.separator)
-            self.menu.add(rumps.MenuItem(status, callback=None))
-            print(f"已添加状态显示: {status}")
+            self.menu.add(self._status_item)
+            logger.info(f"已添加状态显示: {status}")
 
         # 如果之前存在退出按钮，则重新添加
         if quit_item is not None:
@@ -172,142 +323,195 @@ class NewsFilterMenuBar(rumps.App):
 
         # 更新标题显示当前选择
         self.update_title()
-        print("菜单重建完成")
+        logger.info("菜单重建完成")
+
+    def _short_website_name(self, website):
+        """获取网站的简短名称（提取域名中间部分，去除www和com等），结果按网站缓存"""
+        short_name = self._short_name_cache.get(website)
+        if short_name is not None:
+            return short_name
+
+        # 依次去掉协议头和 www 前缀，再取第一个点之前的部分
+        name = website
+        if name.startswith('https://'):
+            name = name[8:]
+        elif name.startswith('http://'):
+            name = name[7:]
+        if name.startswith('www.'):
+            name = name[4:]
+        # 去掉前缀后为空时保留原样
+        short_name = name.split('.', 1)[0] or website
+
+        self._short_name_cache[website] = short_name
+        return short_name
 
     def update_title(self):
         """更新菜单栏标题显示当前选择"""
         if self.current_website:
-            # 提取域名中间部分，去除www和com等
-            domain_parts = self.current_website.split('.')
-
-            # 如果长度至少为3，可能包含www前缀
-            if len(domain_parts) >= 3 and domain_parts[0].lower() in ['www', 'https://www']:
-                # 去除www和最后一个部分(com/org等)，只保留中间部分
-                self.current_website_name = domain_parts[1]
-            # 如果只有两部分(如example.com)
-            elif len(domain_parts) >= 2:
-                # 只保留第一个部分
-                self.current_website_name = domain_parts[0]
-            else:
-                # 如果格式不符合预期，保留原样
-                self.current_website_name = self.current_website
-
+            self.current_website_name = self._short_website_name(self.current_website)
             self.title = f"{self.current_website_name}"
         else:
             self.title = "️"
-        print(f"菜单标题更新为: {self.title}")
+        logger.info(f"菜单标题更新为: {self.title}")
 
     def set_icon_state(self, is_working=False):
         """更新应用图标状态"""
         icon_key = 'working' if is_working else 'idle'
 
         # 如果当前图标已经是目标状态，则不进行操作
-        if hasattr(self, "_current_icon_state") and self._current_icon_state == icon_key:
+        if self._current_icon_state == icon_key:
             return
 
-        print(f"set_icon_state 被调用, 目标图标: {icon_key}")
+        logger.info(f"set_icon_state 被调用, 目标图标: {icon_key}")
         self._current_icon_state = icon_key  # 记录当前图标状态
 
-        # 取消之前的定时器（如果存在）
-        if hasattr(self, "_icon_timer") and self._icon_timer is not None:
-            self._icon_timer.stop()
-            self._icon_timer = None
-
-        def delayed_set(_):
-            self.icon = self.icons[icon_key]
-
-            # 只在调试模式下打印或使用日志记录而非直接打印
-            if hasattr(self, "debug_mode") and self.debug_mode:
-                print(f"已切换到{icon_key}图标")
-
-            # 轻微改变菜单以触发刷新 - 使用更简洁的方式
-            original_title = self.title
-            self.title = original_title + " "
-            self.title = original_title
-
-            # 完成后清除定时器引用
-            self._icon_timer = None
+        # 图标只能在主线程上修改；其他线程调用时交给主线程的界面回调队列
+        if threading.current_thread() is threading.main_thread():
+            self._apply_icon(icon_key)
+        else:
+            self._call_on_main_thread(lambda: self._apply_icon(icon_key))
 
-        self._icon_timer = rumps.Timer(delayed_set, 0.2)
-        self._icon_timer.start()
+    def _load_icon_images(self):
+        """预先加载各状态图标的 NSImage；依赖的 rumps 内部函数不可用时返回空字典"""
+        try:
+            from rumps.rumps import _nsimage_from_file
+            template = getattr(self, '_template', None)
+            return {key: _nsimage_from_file(path, template=template) for key, path in self.icons.items()}
+        except Exception as e:
+            logger.info(f"无法预加载图标，将按路径设置: {e}")
+            return {}
 
+    def _apply_icon(self, icon_key):
+        """切换状态栏图标，优先复用预先加载的 NSImage，不可用时使用 rumps 公开的 icon setter"""
+        image = self._icon_images.get(icon_key)
+        if image is not None and getattr(self, '_nsapp', None) is not None:
+            try:
+                self._set_preloaded_icon(icon_key, image)
+                return
+            except AttributeError as e:
+                # rumps 内部实现已变化，之后不再尝试
+                logger.warning(f"无法直接设置预加载的图标，改用 icon 属性: {e}")
+                self._icon_images = {}
+        self.icon = self.icons[icon_key]
+
+    def _set_preloaded_icon(self, icon_key, image):
+        """
+        与 rumps 的 icon setter 相同，只是省去了从文件解码图片。
+        所有对 rumps 内部属性的访问都集中在这里，内部接口变化时抛出 AttributeError。
+        """
+        set_status_bar_icon = self._nsapp.setStatusBarIcon
+        if not hasattr(self, '_icon_nsimage'):
+            raise AttributeError("rumps.App 没有 _icon_nsimage 属性")
+        self._icon = self.icons[icon_key]
+        self._icon_nsimage = image
+        set_status_bar_icon()
+
+    def _open_in_finder(self, path):
+        """使用 macOS 的 open 命令打开文件或文件夹，不等待进程退出，避免阻塞菜单栏主线程"""
+        subprocess.Popen(["open", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
     def show_notification(self, title, subtitle, message):
         """显示通知并在控制台打印"""
-        print(f"\n通知: [{title}] {subtitle}\n{message}")
+        logger.info(f"通知: [{title}] {subtitle}\n{message}")
         try:
             rumps.notification(title, subtitle, message)
         except Exception as e:
-            print(f"rumps通知失败: {e}")
+            logger.error(f"rumps通知失败: {e}")
+
+    def _ensure_qt_app(self):
+        """首次使用对话框时才导入并初始化PyQt应用"""
+        if self.qt_app is None:
+            from PyQt6.QtWidgets import QApplication
+            self.qt_app = QApplication.instance() or QApplication(sys.argv)
 
     def qt_input_dialog(self, title, message, default_text="", multiline=False):
         """使用PyQt显示输入对话框"""
-        print(f"\n对话框: [{title}] {message}")
+        logger.info(f"对话框: [{title}] {message}")
         try:
             # 确保在主线程中执行
+            self._ensure_qt_app()
+            from utils.dialog_window import InputDialog
             dialog = InputDialog(title, message, default_text, multiline)
             result = dialog.get_text()
-            print(f"用户输入: {result}")
+            logger.info(f"用户输入: {result}")
             return result
         except Exception as e:
-            print(f"对话框显示失败: {e}")
+            logger.error(f"对话框显示失败: {e}")
         return None
 
     def qt_confirm_dialog(self, title, message):
         """使用PyQt显示确认对话框"""
-        print(f"\n确认对话框: [{title}] {message}")
+        logger.info(f"确认对话框: [{title}] {message}")
         try:
+            self._ensure_qt_app()
+            from utils.dialog_window import confirm_dialog
             confirmed = confirm_dialog(title, message)
-            print(f"用户选择: {'确定' if confirmed else '取消'}")
+            logger.info(f"用户选择: {'确定' if confirmed else '取消'}")
             return confirmed
         except Exception as e:
-            print(f"确认对话框失败: {e}")
+            logger.error(f"确认对话框失败: {e}")
         return False
 
     def select_saved_config(self, sender):
         """选择已保存的配置组合"""
         try:
             title = sender.title
-            print(f"\n选择配置: {title}")
+            logger.info(f"选择配置: {title}")
             site, cmd_name = title.split(": ", 1)
             self.current_website = site
             self.current_command_name = cmd_name
             # 更新网站名称
             self.update_title()
-            print(f"已设置当前网站: {site}")
-            print(f"已设置当前指令: {cmd_name}")
-            self.setup_menu()
+            logger.info(f"已设置当前网站: {site}")
+            logger.info(f"已设置当前指令: {cmd_name}")
+            self.refresh_selection()
             self.show_notification("NewsFilter", "配置已选择",
                                    f"当前网站: {self.current_website_name}\n当前指令: {cmd_name}")
+            self._restart_running_task()
         except ValueError as e:
-            print(f"选择配置失败: {e}")
+            logger.error(f"选择配置失败: {e}")
             self.show_notification("NewsFilter", "错误", "配置格式不正确")
 
+    @staticmethod
+    def _saved_title(config_pair):
+        """已保存配置的菜单标题，格式为 网站: 指令名称"""
+        return f"{config_pair[0]}: {config_pair[1]}"
+
+    def _set_saved_configs(self, configs):
+        """替换已保存的配置组合，并生成对应的菜单标题"""
+        self.saved_configs = {tuple(pair): self._saved_title(pair) for pair in configs}
+
     def save_current_config(self, _):
         """保存当前的网站和指令组合"""
-        print("\n保存当前配置")
+        logger.info("保存当前配置")
         if not self.current_website or not self.current_command_name:
-            print("错误: 未选择网站或指令")
+            logger.error("错误: 未选择网站或指令")
             self.show_notification("NewsFilter", "错误", "请先选择网站和指令")
             return
 
         config_pair = (self.current_website, self.current_command_name)
         if config_pair in self.saved_configs:
-            print(f"配置已存在: {config_pair}")
+            logger.info(f"配置已存在: {config_pair}")
             self.show_notification("NewsFilter", "提示", "此配置组合已保存")
             return
 
-        self.saved_configs.append(config_pair)
-        print(f"已添加配置: {config_pair}")
-        self.save_config()
-        self.setup_menu()
+        title = self.saved_configs[config_pair] = self._saved_title(config_pair)
+        logger.info(f"已添加配置: {config_pair}")
+        self._schedule_save()
+        if len(self.saved_configs) > 1:
+            # "我的配置" 菜单已存在，只追加新的菜单项
+            self._cached_item('submenu', "我的配置").add(
+                self._cached_item('config', title, self.select_saved_config))
+            self.refresh_selection()
+        else:
+            self.setup_menu()
         # 使用更简洁的网站名称显示
         self.show_notification("NewsFilter", "配置已保存",
                                f"已保存配置: {self.current_website_name} - {self.current_command_name}")
 
     def add_website(self, _):
         """添加新网站"""
-        print("\n添加新网站")
+        logger.info("添加新网站")
         website = self.qt_input_dialog("添加网站", "请输入网站名称或URL:")
         if website and website.strip():
             website = website.strip()
@@ -316,119 +520,135 @@ class NewsFilterMenuBar(rumps.App):
                 self.current_website = website
                 # 立即更新网站名称显示
                 self.update_title()
-                print(f"已添加新网站: {website}")
-                self.save_config()
-                self.setup_menu()
+                logger.info(f"已添加新网站: {website}")
+                self._schedule_save()
+                if len(self.websites) > 1:
+                    # 网站子菜单已存在，只把新菜单项插到最后一个网站之后（分隔线和“添加”之前，与重建时一致）
+                    self._cached_item('submenu', "我的网站").insert_after(
+                        self.websites[-2], self._cached_item('website', website, self.select_website))
+                    self._cached_item('submenu', "删除网站").add(
+                        self._cached_item('delete_website', website, self.delete_website))
+                    self.refresh_selection()
+                else:
+                    self.setup_menu()
                 self.show_notification("NewsFilter", "网站已添加", f"当前网站: {self.current_website_name}")
             else:
-                print(f"网站已存在: {website}")
+                logger.info(f"网站已存在: {website}")
                 self.current_website = website
                 # 立即更新网站名称显示
-                self.update_title()
-                self.setup_menu()
+                self.refresh_selection()
                 self.show_notification("NewsFilter", "提示", f"此网站已在列表中，已选择: {self.current_website_name}")
         else:
-            print("用户取消或输入为空")
+            logger.info("用户取消或输入为空")
 
     def add_command(self, _):
         """添加新指令 - 使用组合输入对话框"""
-        print("\n添加新指令")
+        logger.info("添加新指令")
         try:
             # 使用组合输入对话框
+            self._ensure_qt_app()
+            from utils.dialog_window import CommandInputDialog
             dialog = CommandInputDialog("添加指令")
             command_name, command = dialog.get_inputs()
 
             if not command_name or not command:
-                print("用户取消或输入为空")
+                logger.info("用户取消或输入为空")
                 return
 
             if command_name not in self.commands:
                 self.commands[command_name] = command  # 存储到字典中
                 self.current_command_name = command_name
-                print(f"已添加新指令: {command_name}")
-                self.save_config()
-                self.setup_menu()
+                logger.info(f"已添加新指令: {command_name}")
+                self._schedule_save()
+                if len(self.commands) > 1:
+                    # 指令子菜单已存在，只把新菜单项插到最后一个指令之后（分隔线和“添加”之前，与重建时一致）
+                    self._cached_item('submenu', "我的指令").insert_after(
+                        list(self.commands)[-2], self._cached_item('command', command_name, self.select_command))
+                    self._cached_item('submenu', "删除指令").add(
+                        self._cached_item('delete_command', command_name, self.delete_command))
+                    self.refresh_selection()
+                else:
+                    self.setup_menu()
                 self.show_notification("NewsFilter", "指令已添加", f"当前指令: {command_name}")
             else:
-                print(f"指令名称已存在: {command_name}")
+                logger.info(f"指令名称已存在: {command_name}")
                 self.show_notification("NewsFilter", "提示", "此指令名称已在列表中")
                 self.current_command_name = command_name
-                self.setup_menu()
+                self.refresh_selection()
         except Exception as e:
-            print(f"添加指令失败: {e}")
+            logger.error(f"添加指令失败: {e}")
             self.show_notification("NewsFilter", "错误", f"添加指令失败: {str(e)}")
 
     def select_website(self, sender):
         """选择网站回调"""
         website = sender.title
-        print(f"\n选择网站: {website}")
+        logger.info(f"选择网站: {website}")
         self.current_website = website
-        self.update_title()
-        self.setup_menu()  # 重建菜单以更新状态
+        self.refresh_selection()  # 只更新选中状态，无需重建菜单
         self.show_notification("NewsFilter", "网站已选择", f"当前网站: {self.current_website_name}")
+        self._restart_running_task()
 
     def select_command(self, sender):
         """选择指令回调"""
         command_name = sender.title
-        print(f"\n选择指令: {command_name}")
+        logger.info(f"选择指令: {command_name}")
         self.current_command_name = command_name
-        self.setup_menu()  # 重建菜单以更新状态
+        self.refresh_selection()  # 只更新选中状态，无需重建菜单
         self.show_notification("NewsFilter", "指令已选择", f"当前指令: {self.current_command_name}")
+        self._restart_running_task()
 
     def edit_config_file(self, _):
         """在文本编辑器中编辑配置文件"""
-        print("\n编辑配置文件")
-        self.save_config()
-        subprocess.call(["open", CONFIG_FILE])
-        print(f"已打开配置文件: {CONFIG_FILE}")
+        logger.info("编辑配置文件")
+        self._flush_save()
+        self.save_config(pretty=True)  # 打开前确保文件已写入磁盘，并使用便于阅读的缩进格式
+        self._open_in_finder(CONFIG_FILE)
+        logger.info(f"已打开配置文件: {CONFIG_FILE}")
         self.show_notification("NewsFilter", "配置文件", "已打开配置文件，保存后重启应用生效")
 
     def clear_config(self, _):
         """清除所有配置"""
-        print("\n清除所有配置")
+        logger.info("清除所有配置")
         confirm = self.qt_confirm_dialog("确认", "确定要清除所有配置吗?")
         if confirm:
-            print("用户确认清除配置")
+            logger.info("用户确认清除配置")
             self.websites = []
+            self._short_name_cache.clear()
             self.commands = {}  # 清空字典
-            self.saved_configs = []
+            self._set_saved_configs([])
             self.current_website = ""
             self.current_command_name = ""
-            print("已清空所有配置数据")
-            self.save_config()
+            self._evict_menu_items([key for key in self._menu_cache if key[0] != 'submenu'])
+            logger.info("已清空所有配置数据")
+            self._schedule_save()
             self.setup_menu()
             self.show_notification("NewsFilter", "配置已清除", "所有配置已被清除")
         else:
-            print("用户取消清除操作")
+            logger.info("用户取消清除操作")
 
     def start_task(self, _):
-        """开始任务 - 非异步版本，启动一个线程来执行异步操作"""
-        print("\n开始任务")
-        if self.task_running:
-            print("错误: 任务已在进行中")
-            self.show_notification("NewsFilter", "任务进行中", "请等待当前任务完成")
-            return
-
+        """开始任务 - 非异步版本，将异步任务提交到后台事件循环"""
+        logger.info("开始任务")
         if not self.current_website:
-            print("错误: 未选择网站")
+            logger.error("错误: 未选择网站")
             self.show_notification("NewsFilter", "错误", "请先选择或添加一个网站")
             return
 
         if not self.current_command_name:
-            print("错误: 未选择指令")
+            logger.error("错误: 未选择指令")
             self.show_notification("NewsFilter", "错误", "请先选择或添加一个指令")
             return
 
         # 获取指令内容
         command_content = self.commands.get(self.current_command_name)
         if not command_content:
-            print(f"错误: 找不到指令内容: {self.current_command_name}")
+            logger.error(f"错误: 找不到指令内容: {self.current_command_name}")
             self.show_notification("NewsFilter", "错误", "指令内容不存在")
             return
 
         # 检查API Key
         if not self.api_key:
-            print("错误: 未配置API Key")
+            logger.error("错误: 未配置API Key")
             self.show_notification("NewsFilter", "错误", "请先配置API Key")
             self.configure_api_key(None)
             if not self.api_key:  # 如果用户取消了配置
@@ -436,78 +656,153 @@ class NewsFilterMenuBar(rumps.App):
 
         # 确保Agent实例存在
         if not self.agent:
-            self.agent = Agent(api_key=self.api_key)
+            self._new_agent()
 
-        print(f"开始执行任务: 网站={self.current_website}, 指令={self.current_command_name}")
+        logger.info(f"开始执行任务: 网站={self.current_website}, 指令={self.current_command_name}")
         self.show_notification("NewsFilter", "任务开始",
                                f"网站: {self.current_website_name}\n指令: {self.current_command_name}")
 
+        # 重复触发时取消正在进行的任务，新任务等它释放浏览器后再开始
+        if self._cancel_current_task(superseded=True) is not None:
+            logger.info("已取消正在进行的任务，重新开始")
+
         # 设置任务状态并更新图标
         self.task_running = True
         self.set_icon_state(is_working=True)  # 切换到工作图标
 
-        # 启动一个线程来运行异步任务
-        threading.Thread(target=self._run_async_task, args=(command_content,), daemon=True).start()
+        # 提交到常驻的后台事件循环执行
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute_task(command_content, self.current_website), self._loop)
+        self._current_future = future
+        future.add_done_callback(self._on_task_done)
+
+    def _new_agent(self):
+        """创建 Agent 实例；开启会话模式，多次任务复用同一个浏览器会话"""
+        from agent import Agent  # 延迟导入，启动时无需加载 Playwright 与 OpenAI
+        self.agent = Agent(api_key=self.api_key, session_mode=True)  # 传入API Key
+        self._last_agent_site = None
+
+    def _cancel_current_task(self, superseded=False):
+        """
+        取消正在进行的任务，返回被取消的 future（没有进行中的任务时返回 None）。
+        superseded 为 True 表示即将由新任务取代：先解除关联再取消，
+        因为 cancel() 会在当前线程同步触发 _on_task_done，解除后回调会把它当作已被取代的任务忽略，
+        不会重置新任务的运行状态和图标。
+        """
+        future = self._current_future
+        if future is None or future.done():
+            return None
+        if superseded:
+            self._current_future = None
+        future.cancel()
+        return future
+
+    def cancel_task(self, _):
+        """取消任务菜单回调"""
+        logger.info("取消任务")
+        if self._cancel_current_task() is None:
+            self.show_notification("NewsFilter", "提示", "当前没有进行中的任务")
+            return
+        self.show_notification("NewsFilter", "任务已取消", "正在关闭浏览器")
 
-    def _run_async_task(self, command_content):
-        """在单独的线程中运行异步任务"""
-        try:
-            # 设置网站
-            self.agent.set_website(self.current_website)
+    def _restart_running_task(self):
+        """任务进行中切换了网站或指令时，取消旧任务并按新选择重新开始"""
+        if self.task_running:
+            self.start_task(None)
 
-            # 为这个线程创建一个新的事件循环
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    def _run_loop(self):
+        """后台线程：运行常驻事件循环，所有任务共用"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
 
-            # 运行异步任务
-            loop.run_until_complete(self._execute_task(command_content))
-            loop.close()
+    def _shutdown_loop(self, timeout=5):
+        """退出时关闭常驻的浏览器会话并停止后台事件循环（只执行一次）"""
+        if self._loop_stopped:
+            return
+        self._loop_stopped = True
+        self._cancel_current_task()
+        if self.agent is not None:
+            future = asyncio.run_coroutine_threadsafe(self._close_browser_session(), self._loop)
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                logger.error(f"关闭浏览器会话失败: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _close_browser_session(self):
+        """等被取消的任务清理完毕后，彻底关闭浏览器会话"""
+        async with self._task_lock:
+            await self.agent.hands.hard_cleanup()
+
+    def _call_on_main_thread(self, func):
+        """
+        安排 func 在 rumps 主线程上执行一次（可从任意线程调用）。
+        通过 AppHelper.callAfter 投递到主线程的 run loop，没有待执行的回调时不会唤醒应用。
+        """
+        AppHelper.callAfter(self._run_ui_callback, func)
+
+    @staticmethod
+    def _run_ui_callback(func):
+        """主线程上执行 UI 回调，异常只记录日志"""
+        try:
+            func()
         except Exception as e:
-            print(f"任务执行出错: {e}")
-
-            # 在主线程上安排通知
-            def show_error_notification(_):
-                self.show_notification("NewsFilter", "任务失败", str(e))
-                # 任务失败时切换回空闲图标
-                self.set_icon_state(is_working=False)
-
-            timer = rumps.Timer(show_error_notification, 0.1)
-            timer.start()
-        finally:
-            # 标记任务完成，并在主线程上切换回空闲图标
-            self.task_running = False
-
-            def restore_idle_state(_):
-                self.set_icon_state(is_working=False)
+            logger.error(f"执行界面回调失败: {e}")
 
-            timer = rumps.Timer(restore_idle_state, 0.1)
-            timer.start()
-
-    async def _execute_task(self, command_content):
-        """实际的异步任务执行"""
-        try:
-            # 使用指令内容执行任务
-            await self.agent.work(command_content)
+    def _on_task_done(self, future):
+        """任务结束回调：任务执行完毕时在后台事件循环线程中调用，被取消时在调用 cancel() 的线程中同步调用"""
+        if future is not self._current_future:
+            # 已被新任务取代，状态由新任务维护
+            return
 
-            # 任务完成后在主线程上安排通知
-            def show_completion_notification(_):
+        # 标记任务完成
+        self.task_running = False
+        self._current_future = None
+        # 任务结束时写入尚未落盘的配置
+        self._flush_save()
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            logger.error(f"任务执行出错: {error}")
+
+        # 在主线程上安排通知，并切换回空闲图标
+        def notify():
+            if error is not None:
+                self.show_notification("NewsFilter", "任务失败", str(error))
+            elif not future.cancelled():
                 self.show_notification(
                     "NewsFilter",
                     "任务完成",
                     f"网站: {self.current_website_name}\n指令: {self.current_command_name}"
                 )
-                # 切换回空闲图标
-                self.set_icon_state(is_working=False)
+            self.set_icon_state(is_working=False)
+
+        self._call_on_main_thread(notify)
 
-            timer = rumps.Timer(show_completion_notification, 0.1)
-            timer.start()
+    async def _execute_task(self, command_content, website):
+        """实际的异步任务执行"""
+        # 同一时间只允许一个任务使用浏览器，被取消的旧任务清理完毕后才会释放
+        async with self._task_lock:
+            await self._run_agent(command_content, website)
+
+    async def _run_agent(self, command_content, website):
+        """设置网站并使用指令内容执行任务"""
+        try:
+            # 网站未变化时跳过重复设置
+            if website != self._last_agent_site:
+                self.agent.set_website(website)
+                self._last_agent_site = website
+            # 取消时 agent.work 的 finally 会关闭浏览器
+            await self.agent.work(command_content)
+        except asyncio.CancelledError:
+            logger.info("任务已取消")
+            raise
         except Exception as e:
-            print(f"执行任务时出错: {e}")
-            raise  # 重新抛出异常，让_run_async_task捕获
+            logger.error(f"执行任务时出错: {e}")
+            raise  # 重新抛出异常，由_on_task_done处理
 
     def open_logs(self, _):
         """打开日志文件夹"""
-        print("\n查看日志")
+        logger.info("查看日志")
 
         # 定义日志文件夹路径
         log_dir = "./logs"
@@ -516,118 +811,180 @@ class NewsFilterMenuBar(rumps.App):
         try:
             if not os.path.exists(log_dir):
                 os.makedirs(log_dir)
-                print(f"创建日志文件夹: {os.path.abspath(log_dir)}")
+                logger.info(f"创建日志文件夹: {os.path.abspath(log_dir)}")
 
             # 在 macOS 上使用 open 命令打开文件夹
             abs_path = os.path.abspath(log_dir)
-            subprocess.call(["open", abs_path])
-            print(f"已打开日志文件夹: {abs_path}")
+            self._open_in_finder(abs_path)
+            logger.info(f"已打开日志文件夹: {abs_path}")
 
             self.show_notification("NewsFilter", "日志", f"已打开日志文件夹")
         except Exception as e:
             error_msg = f"打开日志文件夹失败: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             self.show_notification("NewsFilter", "错误", error_msg)
 
     def configure_api_key(self, _):
         """配置API Key"""
-        print("\n配置API Key")
+        logger.info("配置API Key")
         api_key = self.qt_input_dialog("配置API Key", "请输入您的API Key:", self.api_key)
         if api_key and api_key.strip():
             self.api_key = api_key.strip()
-            print("API Key已更新")
-            self.save_config()
+            logger.info("API Key已更新")
+            self._schedule_save()
             self.show_notification("NewsFilter", "API Key已更新", "API Key配置已保存")
-            # 重新初始化Agent
-            self.agent = Agent(api_key=self.api_key)
+            # 只更新 API Key，保留 Agent 及其浏览器会话；尚未创建时由 start_task 按需创建
+            if self.agent:
+                self.agent.update_api_key(self.api_key)
         else:
-            print("API Key配置已取消")
-
-    def save_config(self):
-        """保存配置到文件"""
-        print(f"\n保存配置到: {CONFIG_FILE}")
-        config = {
-            "websites": self.websites,
-            "commands": self.commands,  # 保存为字典 {名称: 内容}
-            "saved_configs": self.saved_configs,
+            logger.info("API Key配置已取消")
+
+    def _schedule_save(self, delay=0.5):
+        """记录当前配置的快照，由后台定时器线程写入；短时间内的多次修改合并为一次写入"""
+        config = self._config_snapshot()
+        with self._save_lock:
+            self._pending_config = config
+            # 已有定时器在等待时只需更新快照，写入延迟不会因连续修改而被无限推迟
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(delay, self._flush_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _flush_save(self):
+        """立即写入待保存的配置快照（由定时器线程、任务结束或退出时调用）"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            config, self._pending_config = self._pending_config, None
+            if config is None:
+                return
+            self._write_config(config)
+
+    def _config_snapshot(self):
+        """在主线程上复制需要持久化的状态，后台线程写入时不受后续修改影响"""
+        return {
+            "schema_version": CONFIG_SCHEMA_VERSION,
+            "websites": list(self.websites),
+            "commands": dict(self.commands),  # 保存为字典 {名称: 内容}
+            "saved_configs": [list(pair) for pair in self.saved_configs],  # 与 JSON 读回的结构保持一致
             "last_website": self.current_website,
             "last_command": self.current_command_name,
             "api_key": self.api_key  # 保存API Key
         }
+
+    @staticmethod
+    def _state_hash(config):
+        """配置快照的哈希值，用于快速判断配置是否有变化"""
+        return hash((tuple(config["websites"]), tuple(config["commands"].items()),
+                     tuple(map(tuple, config["saved_configs"])),
+                     config["last_website"], config["last_command"], config["api_key"]))
+
+    def save_config(self, pretty=False):
+        """立即保存当前配置到文件；pretty 为 True 时以带缩进的格式写入，便于手动编辑"""
+        with self._save_lock:
+            self._write_config(self._config_snapshot(), pretty)
+
+    def _write_config(self, config, pretty=False):
+        """把配置快照写入文件（可在后台线程调用）"""
+        global _CONFIG_CACHE, _CONFIG_MTIME
+        logger.info(f"保存配置到: {CONFIG_FILE}")
         try:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
-            print("配置保存成功")
+            # 状态与上次写入时相同且文件未被外部修改时，无需比较配置字典
+            state_hash = self._state_hash(config)
+            file_unchanged = os.path.exists(CONFIG_FILE) and os.stat(CONFIG_FILE).st_mtime_ns == _CONFIG_MTIME
+            if not pretty and file_unchanged and (state_hash == self._last_state_hash or config == _CONFIG_CACHE):
+                logger.info("配置未变化，跳过写入")
+                return
+
+            _atomic_write(CONFIG_FILE, _dumps(config, pretty))
+            _CONFIG_CACHE = copy.deepcopy(config)
+            _CONFIG_MTIME = os.stat(CONFIG_FILE).st_mtime_ns
+            self._last_state_hash = state_hash
+            logger.info("配置保存成功")
         except Exception as e:
-            print(f"保存配置失败: {e}")
-            self.show_notification("NewsFilter", "错误", "保存配置失败")
+            logger.error(f"保存配置失败: {e}")
+            self._call_on_main_thread(lambda: self.show_notification("NewsFilter", "错误", "保存配置失败"))
+
+    @staticmethod
+    def _migrate_commands(config):
+        """把旧版本配置中的指令转换为 {名称: 内容} 字典，返回 (指令字典, 当前指令名称)"""
+        # 处理commands，兼容旧格式(列表)和新格式(字典)
+        commands_data = config.get("commands", {})
+        if isinstance(commands_data, list):
+            # 旧格式：将列表转换为字典
+            logger.info("检测到旧格式的指令配置，正在转换...")
+            commands = {}
+            for i, cmd in enumerate(commands_data):
+                # 如果是元组(已经是新格式的一部分过渡)
+                if isinstance(cmd, list) and len(cmd) == 2:
+                    commands[cmd[0]] = cmd[1]
+                else:
+                    # 完全旧格式，使用序号作为名称
+                    commands[f"指令 {i + 1}"] = cmd
+            logger.info(f"转换完成，共 {len(commands)} 个指令")
+        else:
+            commands = commands_data
+
+        # 旧版本的 last_command 可能是指令内容而非名称，通过内容到名称的反向索引查找
+        last_command = config.get("last_command", "")
+        if not last_command or last_command in commands:
+            return commands, last_command
+        name_by_content = {content: name for name, content in reversed(list(commands.items()))}
+        return commands, name_by_content.get(last_command, "")
 
     def load_config(self):
         """从文件加载配置"""
-        print(f"\n加载配置: {CONFIG_FILE}")
+        global _CONFIG_CACHE, _CONFIG_MTIME
+        logger.info(f"加载配置: {CONFIG_FILE}")
         if os.path.exists(CONFIG_FILE):
             try:
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    self.websites = config.get("websites", [])
-
-                    # 处理commands，兼容旧格式(列表)和新格式(字典)
-                    commands_data = config.get("commands", {})
-                    if isinstance(commands_data, list):
-                        # 旧格式：将列表转换为字典
-                        print("检测到旧格式的指令配置，正在转换...")
-                        self.commands = {}
-                        for i, cmd in enumerate(commands_data):
-                            # 如果是元组(已经是新格式的一部分过渡)
-                            if isinstance(cmd, list) and len(cmd) == 2:
-                                self.commands[cmd[0]] = cmd[1]
-                            else:
-                                # 完全旧格式，使用序号作为名称
-                                cmd_name = f"指令 {i + 1}"
-                                self.commands[cmd_name] = cmd
-                        print(f"转换完成，共 {len(self.commands)} 个指令")
-                    else:
-                        # 新格式：直接使用字典
-                        self.commands = commands_data
-
-                    self.saved_configs = config.get("saved_configs", [])
-                    self.current_website = config.get("last_website", "")
-
-                    # 处理当前指令名称，兼容旧版本
+                # 文件未被修改时直接使用内存缓存，避免重复解析
+                mtime = os.stat(CONFIG_FILE).st_mtime_ns
+                if _CONFIG_CACHE is not None and mtime == _CONFIG_MTIME:
+                    config = copy.deepcopy(_CONFIG_CACHE)
+                else:
+                    with open(CONFIG_FILE, 'rb') as f:
+                        config = _loads(f.read())
+                    _CONFIG_CACHE = copy.deepcopy(config)
+                    _CONFIG_MTIME = mtime
+
+                self.websites = config.get("websites", [])
+                self._set_saved_configs(config.get("saved_configs", []))
+                self.current_website = config.get("last_website", "")
+                self.api_key = config.get("api_key", "")
+
+                needs_migration = config.get("schema_version", 1) < CONFIG_SCHEMA_VERSION
+                if needs_migration:
+                    # 旧版本配置：转换一次并立即写回，之后启动直接按新格式读取
+                    self.commands, self.current_command_name = self._migrate_commands(config)
+                else:
+                    self.commands = config.get("commands", {})
                     last_command = config.get("last_command", "")
-                    # 如果last_command是字符串，可能是旧格式的指令内容或新格式的指令名称
-                    if last_command:
-                        if last_command in self.commands:
-                            # 新格式：名称存在于字典中
-                            self.current_command_name = last_command
-                        else:
-                            # 旧格式：需要找出对应的名称
-                            for name, content in self.commands.items():
-                                if content == last_command:
-                                    self.current_command_name = name
-                                    break
-                            else:
-                                self.current_command_name = ""
-
-                    self.api_key = config.get("api_key", "")
-                print("配置加载成功")
-                print(f"已加载 {len(self.websites)} 个网站")
-                print(f"已加载 {len(self.commands)} 个指令")
-                print(f"已加载 {len(self.saved_configs)} 个保存的配置")
+                    self.current_command_name = last_command if last_command in self.commands else ""
+
+                logger.info("配置加载成功")
+                logger.info(f"已加载 {len(self.websites)} 个网站")
+                logger.info(f"已加载 {len(self.commands)} 个指令")
+                logger.info(f"已加载 {len(self.saved_configs)} 个保存的配置")
                 if self.api_key:
-                    print("已加载API Key配置")
+                    logger.info("已加载API Key配置")
+                if needs_migration:
+                    self.save_config()
             except Exception as e:
-                print(f"加载配置失败: {e}")
+                logger.error(f"加载配置失败: {e}")
 
     def delete_website(self, sender):
         """删除单个网站"""
         website = sender.title
-        print(f"\n删除网站: {website}")
+        logger.info(f"删除网站: {website}")
 
         # 从网站列表中移除
         if website in self.websites:
             self.websites.remove(website)
-            print(f"已删除网站: {website}")
+            self._short_name_cache.pop(website, None)
+            logger.info(f"已删除网站: {website}")
 
             # 如果删除的是当前选择的网站，则清除当前选择
             if self.current_website == website:
@@ -635,44 +992,59 @@ class NewsFilterMenuBar(rumps.App):
                 self.current_website_name = ""
 
             # 移除相关的已保存配置
-            self.saved_configs = [(site, cmd) for site, cmd in self.saved_configs
-                                  if site != website]
+            removed_titles = [self.saved_configs.pop(pair) for pair in
+                              [pair for pair in self.saved_configs if pair[0] == website]]
+            self._evict_menu_items([('website', website), ('delete_website', website)] +
+                                   [('config', title) for title in removed_titles])
 
             # 保存配置并更新菜单
-            self.save_config()
-            self.setup_menu()
-            self.update_title()
+            self._schedule_save()
+            self._update_menu_after_delete(
+                [("我的网站", website), ("删除网站", website)] + [("我的配置", title) for title in removed_titles],
+                bool(self.websites), bool(removed_titles))
             self.show_notification("NewsFilter", "删除成功", f"已删除网站: {website}")
         else:
-            print(f"错误: 网站不存在: {website}")
+            logger.error(f"错误: 网站不存在: {website}")
+
+    def _update_menu_after_delete(self, entries, list_remaining, removed_configs):
+        """删除条目后更新菜单：列表或 "我的配置" 变为空属于结构变化，需要重建，否则只移除对应菜单项"""
+        if not list_remaining or (removed_configs and not self.saved_configs):
+            self.setup_menu()
+            return
+        self._remove_menu_entries(entries)
+        self.refresh_selection()
 
     def delete_command(self, sender):
         """删除单个指令"""
         cmd_name = sender.title
-        print(f"\n删除指令: {cmd_name}")
+        logger.info(f"删除指令: {cmd_name}")
 
         # 从指令字典中移除
         if cmd_name in self.commands:
             del self.commands[cmd_name]
-            print(f"已删除指令: {cmd_name}")
+            logger.info(f"已删除指令: {cmd_name}")
 
             # 如果删除的是当前选择的指令，则清除当前选择
             if self.current_command_name == cmd_name:
                 self.current_command_name = ""
 
             # 移除相关的已保存配置
-            self.saved_configs = [(site, cmd) for site, cmd in self.saved_configs
-                                  if cmd != cmd_name]
+            removed_titles = [self.saved_configs.pop(pair) for pair in
+                              [pair for pair in self.saved_configs if pair[1] == cmd_name]]
+            self._evict_menu_items([('command', cmd_name), ('delete_command', cmd_name)] +
+                                   [('config', title) for title in removed_titles])
 
             # 保存配置并更新菜单
-            self.save_config()
-            self.setup_menu()
+            self._schedule_save()
+            self._update_menu_after_delete(
+                [("我的指令", cmd_name), ("删除指令", cmd_name)] + [("我的配置", title) for title in removed_titles],
+                bool(self.commands), bool(removed_titles))
             self.show_notification("NewsFilter", "删除成功", f"已删除指令: {cmd_name}")
         else:
-            print(f"错误: 指令不存在: {cmd_name}")
+            logger.error(f"错误: 指令不存在: {cmd_name}")
 
 
 if __name__ == "__main__":
-    print("启动 NewsFilter 应用")
+    logger.info("启动 NewsFilter 应用")
     app = NewsFilterMenuBar()
     app.run()
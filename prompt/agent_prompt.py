@@ -1,12 +1,32 @@
+import string
+from functools import lru_cache
+
 from utils.get_absolute_path import get_absolute_path
 
 
-def get_prompt(**kwargs):
-    _user_instruction = kwargs.get('user_instruction')
-    _history = kwargs.get('history')
-    _visible_elements = kwargs.get('visible_elements')
+@lru_cache(maxsize=1)
+def _load_template():
+    # 模板文件只在首次调用时读取一次，之后复用缓存内容
     path = get_absolute_path("/prompt/prompt_template.txt")
-    with open(path, 'r') as f:
-        content = f.read()
-    content = content.format(user_command=_user_instruction, history=_history, visible_elements=_visible_elements)
-    return content
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=1)
+def _compile_template():
+    # 预先把模板拆分为 (字面量, 占位符名称) 片段，避免每次调用都重新解析格式串
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(_load_template()))
+
+
+def get_prompt(**kwargs):
+    values = {
+        'user_command': kwargs.get('user_instruction'),
+        'history': kwargs.get('history'),
+        'visible_elements': kwargs.get('visible_elements'),
+    }
+    parts = []
+    for literal, field in _compile_template():
+        parts.append(literal)
+        if field is not None:
+            parts.append(str(values[field]))
+    return ''.join(parts)
@@ -1,8 +1,10 @@
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QWidget,
+from functools import lru_cache
+
+from PyQt6.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout, QWidget,
                              QLabel, QLineEdit, QTextEdit, QPushButton,
-                             QGraphicsDropShadowEffect, QStyle, QMessageBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon,  QPixmap, QColor, QPainter
+                             QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect, QStyle, QMessageBox)
+from PyQt6.QtCore import Qt, QRect, QRectF
+from PyQt6.QtGui import QIcon,  QPixmap, QImage, QColor, QPainter
 
 # 系统字体和精确颜色
 SYSTEM_FONT = ".AppleSystemUIFont"  # 系统字体
@@ -10,72 +12,193 @@ BACKGROUND_COLOR = "#F5F5F7"
 BUTTON_BLUE = "#007AFF"
 ACCENT_GRAY = "#E5E5EA"
 
+# 窗口阴影参数
+SHADOW_BLUR = 20
+SHADOW_OFFSET = 4
+SHADOW_COLOR = QColor(0, 0, 0, 50)
+CORNER_RADIUS = 10
+
 # 风格样式表
-DIALOG_STYLE = """
-QDialog {
-    background-color: """ + BACKGROUND_COLOR + """;
+DIALOG_STYLE = f"""
+QDialog {{
+    background-color: {BACKGROUND_COLOR};
     border-radius: 10px;
-}
+}}
 
-QLabel {
+QLabel {{
     color: #000000;
-    font-family: """ + SYSTEM_FONT + """;
+    font-family: {SYSTEM_FONT};
     font-size: 13px;
-}
+}}
 
-QLabel[heading=true] {
+QLabel[heading=true] {{
     font-weight: 500;
     font-size: 13px;
-}
+}}
 
-QLineEdit, QTextEdit {
+QLineEdit, QTextEdit {{
     background-color: white;
     border: 1px solid #d0d0d0;
     border-radius: 6px;
     padding: 5px 8px;
-    font-family: """ + SYSTEM_FONT + """;
+    font-family: {SYSTEM_FONT};
     font-size: 13px;
     selection-background-color: #b2d7ff;
-}
+}}
 
-QLineEdit:focus, QTextEdit:focus {
-    border: 1px solid """ + BUTTON_BLUE + """;
-}
+QLineEdit:focus, QTextEdit:focus {{
+    border: 1px solid {BUTTON_BLUE};
+}}
 
-QPushButton {
+QPushButton {{
     background-color: #fbfbfb;
     border: 0.5px solid #c0c0c0;
     border-radius: 6px;
     padding: 1px 10px;
     min-width: 67px;
     min-height: 21px;
-    font-family: """ + SYSTEM_FONT + """;
+    font-family: {SYSTEM_FONT};
     font-size: 14px;
-}
+}}
 
-QPushButton:hover {
+QPushButton:hover {{
     background-color: #f7f7f7;
-}
+}}
 
-QPushButton:pressed {
+QPushButton:pressed {{
     background-color: #e5e5e5;
-}
+}}
 
-QPushButton[primary=true] {
-    background-color: """ + BUTTON_BLUE + """;
+QPushButton[primary=true] {{
+    background-color: {BUTTON_BLUE};
     color: white;
     border: none;
-}
+}}
 
-QPushButton[primary=true]:hover {
+QPushButton[primary=true]:hover {{
     background-color: #0071e3;
-}
+}}
 
-QPushButton[primary=true]:pressed {
+QPushButton[primary=true]:pressed {{
     background-color: #0068d0;
-}
+}}
 """
 
+# 样式表是否已设置到 QApplication 上（只需解析一次，所有对话框共用）
+_style_applied = False
+
+
+def _apply_dialog_style(dialog):
+    """为对话框应用样式表：优先在应用级别设置一次，避免每次创建对话框都重新解析"""
+    global _style_applied
+    app = QApplication.instance()
+    if app is None:
+        dialog.setStyleSheet(DIALOG_STYLE)
+        return
+    if not _style_applied:
+        app.setStyleSheet(DIALOG_STYLE)
+        _style_applied = True
+
+
+@lru_cache(maxsize=32)
+def _scaled_pixmap(path, width, height):
+    """加载并缩放图标，按 (路径, 尺寸) 缓存，重复打开对话框时无需重新解码和缩放"""
+    pixmap = QPixmap(path)
+    if pixmap.isNull():
+        return pixmap
+    return pixmap.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                         Qt.TransformationMode.SmoothTransformation)
+
+
+@lru_cache(maxsize=8)
+def _standard_pixmap(standard_pixmap, size):
+    """获取系统标准图标的位图，按 (图标类型, 尺寸) 缓存"""
+    return QApplication.style().standardIcon(standard_pixmap).pixmap(size, size)
+
+
+def _transparent_image(size):
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    return image
+
+
+@lru_cache(maxsize=1)
+def _shadow_pixmap():
+    """
+    预先渲染一张模糊后的圆角矩形阴影贴图，供九宫格绘制使用。
+    高斯模糊只在首次绘制时计算一次，之后每次重绘只是贴图。
+    """
+    core = CORNER_RADIUS * 2 + 2  # 中心区域只需容纳四个圆角和一像素可拉伸部分
+    size = core + SHADOW_BLUR * 2
+
+    source = _transparent_image(size)
+    painter = QPainter(source)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(SHADOW_COLOR)
+    painter.drawRoundedRect(QRectF(SHADOW_BLUR, SHADOW_BLUR, core, core), CORNER_RADIUS, CORNER_RADIUS)
+    painter.end()
+
+    # 借助 QGraphicsBlurEffect 对贴图做一次模糊
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem(QPixmap.fromImage(source))
+    blur = QGraphicsBlurEffect()
+    blur.setBlurRadius(SHADOW_BLUR)
+    item.setGraphicsEffect(blur)
+    scene.addItem(item)
+
+    result = _transparent_image(size)
+    painter = QPainter(result)
+    scene.render(painter, QRectF(0, 0, size, size), QRectF(0, 0, size, size))
+    painter.end()
+    return QPixmap.fromImage(result)
+
+
+def _draw_nine_slice(painter, target, pixmap, corner):
+    """按九宫格把贴图绘制到 target：四角原样绘制，四边和中心拉伸"""
+    pw, ph = pixmap.width(), pixmap.height()
+    # 源贴图和目标区域在横、纵方向上的三段分割 (起点, 长度)
+    src_x = ((0, corner), (corner, pw - 2 * corner), (pw - corner, corner))
+    src_y = ((0, corner), (corner, ph - 2 * corner), (ph - corner, corner))
+    dst_x = ((target.left(), corner), (target.left() + corner, target.width() - 2 * corner),
+             (target.right() + 1 - corner, corner))
+    dst_y = ((target.top(), corner), (target.top() + corner, target.height() - 2 * corner),
+             (target.bottom() + 1 - corner, corner))
+    for (sy, sh), (dy, dh) in zip(src_y, dst_y):
+        for (sx, sw), (dx, dw) in zip(src_x, dst_x):
+            if dw > 0 and dh > 0:
+                painter.drawPixmap(QRect(dx, dy, dw, dh), pixmap, QRect(sx, sy, sw, sh))
+
+
+def _make_vlayout(parent, spacing):
+    """创建对话框的主布局，所有对话框使用相同的外边距"""
+    layout = QVBoxLayout(parent)
+    layout.setContentsMargins(24, 20, 24, 20)
+    layout.setSpacing(spacing)
+    return layout
+
+
+def _ok_cancel_row(on_cancel, on_ok, top_margin=0):
+    """创建右对齐的“取消 / 确定”按钮行，并连接按钮信号"""
+    row = QHBoxLayout()
+    row.setContentsMargins(0, top_margin, 0, 0)
+    row.setSpacing(12)
+
+    cancel_button = QPushButton("取消")
+    cancel_button.setAutoDefault(False)
+    cancel_button.clicked.connect(on_cancel)
+
+    ok_button = QPushButton("确定")
+    ok_button.setProperty("primary", True)
+    ok_button.setDefault(True)
+    ok_button.clicked.connect(on_ok)
+
+    # 按钮右对齐
+    row.addStretch()
+    row.addWidget(cancel_button)
+    row.addWidget(ok_button)
+    return row
+
 
 class BaseDialog(QDialog):
     """基础对话框"""
@@ -84,28 +207,28 @@ class BaseDialog(QDialog):
         super().__init__()
         self.setWindowTitle(title)
         self.resize(width, height)
-        self.setStyleSheet(DIALOG_STYLE)
+        _apply_dialog_style(self)
 
         # 对话框窗口特性
         self.setWindowFlags(Qt.WindowType.Dialog | Qt.WindowType.WindowStaysOnTopHint)
         self.setWindowModality(Qt.WindowModality.ApplicationModal)
 
-        # 添加窗口阴影效果
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor(0, 0, 0, 50))
-        shadow.setOffset(0, 4)
-        self.setGraphicsEffect(shadow)
+        # 窗口阴影在 paintEvent 中用预渲染的贴图绘制，不使用 QGraphicsDropShadowEffect（每次重绘都要模糊整个窗口）
 
     def paintEvent(self, event):
         """绘制窗口背景和边框"""
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
+        # 绘制阴影
+        shadow_rect = self.rect().translated(0, SHADOW_OFFSET).adjusted(-SHADOW_BLUR, -SHADOW_BLUR,
+                                                                         SHADOW_BLUR, SHADOW_BLUR)
+        _draw_nine_slice(painter, shadow_rect, _shadow_pixmap(), SHADOW_BLUR + CORNER_RADIUS)
+
         # 填充背景
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(QColor(BACKGROUND_COLOR))
-        painter.drawRoundedRect(self.rect(), 10, 10)
+        painter.drawRoundedRect(self.rect(), CORNER_RADIUS, CORNER_RADIUS)
 
         super().paintEvent(event)
 
@@ -117,9 +240,7 @@ class InputDialog(BaseDialog):
         super().__init__(title, width=420, height=height)
 
         # 创建布局
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(24, 20, 24, 20)
-        layout.setSpacing(12)
+        layout = _make_vlayout(self, 12)
 
         # 添加消息标签
         message_label = QLabel(message)
@@ -141,28 +262,7 @@ class InputDialog(BaseDialog):
         layout.addWidget(self.text_input)
 
         # 添加按钮区域 - 精确匹配间距
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(0, 12, 0, 0)
-        button_layout.setSpacing(12)
-
-        # 创建取消和确认按钮
-        cancel_button = QPushButton("取消")
-        cancel_button.setAutoDefault(False)
-
-        ok_button = QPushButton("确定")
-        ok_button.setProperty("primary", True)
-        ok_button.setDefault(True)
-
-        # 按钮右对齐
-        button_layout.addStretch()
-        button_layout.addWidget(cancel_button)
-        button_layout.addWidget(ok_button)
-
-        layout.addLayout(button_layout)
-
-        # 连接信号
-        cancel_button.clicked.connect(self.reject)
-        ok_button.clicked.connect(self.accept)
+        layout.addLayout(_ok_cancel_row(self.reject, self.accept, top_margin=12))
 
     def get_text(self):
         """获取用户输入的文本"""
@@ -182,9 +282,7 @@ class CommandInputDialog(BaseDialog):
         super().__init__(title, width=440, height=340)
 
         # 创建布局 - 精确匹配间距
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(24, 20, 24, 20)
-        layout.setSpacing(16)
+        layout = _make_vlayout(self, 16)
 
         # 指令名称区域
         name_label = QLabel("指令名称")
@@ -212,27 +310,7 @@ class CommandInputDialog(BaseDialog):
         layout.addWidget(self.content_input)
 
         # 按钮区域 - 精确匹配间距
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(0, 4, 0, 0)
-        button_layout.setSpacing(12)
-
-        cancel_button = QPushButton("取消")
-        cancel_button.setAutoDefault(False)
-
-        ok_button = QPushButton("确定")
-        ok_button.setProperty("primary", True)
-        ok_button.setDefault(True)
-
-        # 按钮右对齐
-        button_layout.addStretch()
-        button_layout.addWidget(cancel_button)
-        button_layout.addWidget(ok_button)
-
-        layout.addLayout(button_layout)
-
-        # 连接信号
-        cancel_button.clicked.connect(self.reject)
-        ok_button.clicked.connect(self.accept)
+        layout.addLayout(_ok_cancel_row(self.reject, self.accept, top_margin=4))
 
         # 默认焦点在名称输入框
         self.name_input.setFocus()
@@ -257,9 +335,7 @@ class ConfirmDialog(BaseDialog):
         super().__init__(title, width=420, height=140)
 
         # 创建布局
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(24, 20, 24, 20)
-        layout.setSpacing(12)
+        layout = _make_vlayout(self, 12)
 
         # 创建消息区域
         content_layout = QHBoxLayout()
@@ -268,19 +344,16 @@ class ConfirmDialog(BaseDialog):
         # 添加图标（如果提供）
         if icon_path:
             icon_label = QLabel()
-            pixmap = QPixmap(icon_path)
             # 确保图标大小合适
+            pixmap = _scaled_pixmap(icon_path, 32, 32)
             if not pixmap.isNull():
-                pixmap = pixmap.scaled(32, 32, Qt.AspectRatioMode.KeepAspectRatio,
-                                       Qt.TransformationMode.SmoothTransformation)
                 icon_label.setPixmap(pixmap)
                 icon_label.setFixedSize(32, 32)
                 content_layout.addWidget(icon_label, 0, Qt.AlignmentFlag.AlignTop)
         else:
             # 使用默认警告图标
             icon_label = QLabel()
-            style_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxWarning)
-            pixmap = style_icon.pixmap(32, 32)
+            pixmap = _standard_pixmap(QStyle.StandardPixmap.SP_MessageBoxWarning, 32)
             icon_label.setPixmap(pixmap)
             icon_label.setFixedSize(32, 32)
             content_layout.addWidget(icon_label, 0, Qt.AlignmentFlag.AlignTop)
@@ -295,27 +368,8 @@ class ConfirmDialog(BaseDialog):
         layout.addStretch()
 
         # 添加按钮区域
-        button_layout = QHBoxLayout()
-        button_layout.setSpacing(12)
-
-        cancel_button = QPushButton("取消")
-        cancel_button.setAutoDefault(False)
-
-        confirm_button = QPushButton("确定")
-        confirm_button.setProperty("primary", True)
-        confirm_button.setDefault(True)
-
-        # 按钮右对齐
-        button_layout.addStretch()
-        button_layout.addWidget(cancel_button)
-        button_layout.addWidget(confirm_button)
-
-        layout.addLayout(button_layout)
-
-        # 连接信号
         self.is_confirmed = False
-        cancel_button.clicked.connect(self.reject)
-        confirm_button.clicked.connect(self.accept_confirm)
+        layout.addLayout(_ok_cancel_row(self.reject, self.accept_confirm))
 
     def accept_confirm(self):
         """确认按钮点击回调"""
@@ -1,19 +1,58 @@
 import json
+import logging
 import os
+import re
 from openai import OpenAI
 from prompt.agent_prompt import get_prompt
 from action import Action
 
+logger = logging.getLogger(__name__)
+
+# 优先使用 orjson 解析大模型输出，未安装时回退到标准库 json
+# （orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，异常处理无需区分）
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+# 去除 ```json ... ``` 代码块标记，以及把连续空白折叠为一个空格
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+_WS_RE = re.compile(r'\s+')
+
+# 安装了 h2 时让 httpx 使用 HTTP/2，多个请求复用同一连接并压缩请求头；未安装时保持默认的 HTTP/1.1
+try:
+    import h2  # noqa: F401
+    from openai import DefaultHttpxClient
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+# 按 API Key 缓存的 OpenAI 客户端，复用其连接池，避免重复建立 TLS 连接
+_CLIENTS = {}
+
+
+def _get_client(api_key=None):
+    api_key = api_key or os.getenv("DASHSCOPE_API_KEY")
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        # DefaultHttpxClient 保留 SDK 默认的超时和连接池配置，只额外开启 HTTP/2
+        http_client = DefaultHttpxClient(http2=True) if _HTTP2 else None
+        client = _CLIENTS[api_key] = OpenAI(api_key=api_key, base_url=BASE_URL, http_client=http_client)
+    return client
+
 
 class VisionLLM:
     def __init__(self, model_name='qwen2.5-vl-72b-instruct', api_key=None):
-        self.client = OpenAI(
-            api_key=api_key or os.getenv("DASHSCOPE_API_KEY"),
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
+        self.client = _get_client(api_key)
         self.model = model_name
         self.sys_role = '你是一个浏览器自动化执行助手，根据用户上传的浏览器截图和用户指令规划当前步骤的动作。'
 
+    def set_api_key(self, api_key):
+        """更换 API Key，复用该 Key 对应的已缓存客户端"""
+        self.client = _get_client(api_key)
+
     def parse_llm_output(self, output):
         """
         将 LLM 输出的 JSON 字符串解析为字典，并将 Action 字段转为真正的 Action 类实例。
@@ -26,11 +65,10 @@ class VisionLLM:
         """
         try:
             # 去除 JSON 块的标记，确保只保留纯 JSON 部分
-            cleaned_output = output.strip('```json').strip('```').strip()
-            cleaned_string = " ".join(cleaned_output.split())
+            cleaned_string = _WS_RE.sub(' ', _FENCE_RE.sub('', output)).strip()
 
             # 将字符串解析为字典
-            parsed = json.loads(cleaned_string)
+            parsed = _loads(cleaned_string)
 
             # 验证必需字段
             if 'Action' not in parsed or 'Thought' not in parsed:
@@ -38,16 +76,19 @@ class VisionLLM:
 
             # 构造 Action 实例（如果有参数，就解包传参）
             action_type = parsed['Action']
-            action_params = parsed.get('Parameters', {})
+            # 模型可能输出 "Parameters": null 或非对象的值，统一视为无参数
+            action_params = parsed.get('Parameters')
+            if not isinstance(action_params, dict):
+                action_params = {}
             parsed['Action'] = Action(action_type, action_params)
             return parsed
 
         except json.JSONDecodeError as e:
-            print(f"JSON 解析失败: {e}")
+            logger.error(f"JSON 解析失败: {e}")
         except TypeError as e:
-            print(f"Action 实例化失败: {e}")
+            logger.error(f"Action 实例化失败: {e}")
         except Exception as e:
-            print(f"发生未知错误: {e}")
+            logger.error(f"发生未知错误: {e}")
 
         return None
 
@@ -61,19 +102,27 @@ class VisionLLM:
         model = kwargs.get('model', self.model)
         temperature = kwargs.get('temperature', 1.3)
 
+        prompt = get_prompt(user_instruction=user_instruction, history=history, visible_elements=visible_elements)
         messages = [
             {"role": "system", "content": self.sys_role},
             {"role": "user", "content": [
-                {"type": "text", "text": get_prompt(user_instruction=user_instruction, history=history,
-                                                    visible_elements=visible_elements)},
-                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{_page_info.get('img_base64')}"}}
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {
+                    "url": f"data:{_page_info.get('img_mime', 'image/png')};base64,{_page_info.get('img_base64')}"}}
             ]}
         ]
 
-        completion = self.client.chat.completions.create(
+        # 流式接收输出，首个 token 到达即开始读取；片段先存入列表，最后一次性拼接
+        stream = self.client.chat.completions.create(
             model=model,
             messages=messages,
-            temperature=temperature
+            temperature=temperature,
+            stream=True
         )
-        resp = self.parse_llm_output(completion.choices[0].message.content)
+        parts = []
+        for chunk in stream:
+            # 部分服务在末尾会发送不含 choices 的统计信息块
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        resp = self.parse_llm_output(''.join(parts))
         return resp['Thought'], resp['Action']